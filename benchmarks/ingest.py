@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Contact/review ingestion benchmark for YatraNepal
+
+Several threads post contact messages into a fresh file-backed SQLite
+database, the way concurrent gunicorn threads would during a traffic spike:
+
+  - direct: one session add + commit per message (the old contact() path)
+  - buffered: yatra.ingest's write-behind buffer, journaled with and without
+    fsync, flushed in batches by its background thread
+
+Reports messages per second and the number of SQLite commits each path made.
+
+Usage: python benchmarks/ingest.py [--threads N] [--messages N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def make_app(instance_path, **config):
+    from yatra import create_app
+    from yatra.extensions import db
+
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(instance_path, 'bench.db'),
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}},
+        **config,
+    }, instance_path=instance_path)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def run_threads(app, threads, messages, post):
+    def worker(n):
+        with app.app_context():
+            for i in range(messages):
+                post(name=f'visitor {n}', email='visitor@example.com', subject='Festival trip', message=f'message {i}')
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return start
+
+
+def direct(threads, messages):
+    from yatra.extensions import db
+    from yatra.models import Contact
+
+    def post(**row):
+        db.session.add(Contact(**row))
+        db.session.commit()
+
+    with tempfile.TemporaryDirectory() as instance_path:
+        app = make_app(instance_path)
+        start = run_threads(app, threads, messages, post)
+        return time.perf_counter() - start, threads * messages
+
+
+def buffered(threads, messages, fsync):
+    from yatra.ingest import ingest_buffer
+
+    with tempfile.TemporaryDirectory() as instance_path:
+        app = make_app(instance_path, INGEST_FSYNC=fsync)
+        with app.app_context():
+            buffer = ingest_buffer()
+        start = run_threads(app, threads, messages, lambda **row: buffer.submit('contact', **row))
+        buffer.close()
+        return time.perf_counter() - start, buffer.stats['commits']
+
+
+def report(name, seconds, commits, total):
+    print(f'{name:<18} {total / seconds:10.0f} msg/s   {seconds * 1000:9.1f} ms   commits {commits:6d}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--messages', type=int, default=250, help='messages per thread')
+    args = parser.parse_args()
+    total = args.threads * args.messages
+
+    report('direct', *direct(args.threads, args.messages), total)
+    report('buffered + fsync', *buffered(args.threads, args.messages, True), total)
+    report('buffered', *buffered(args.threads, args.messages, False), total)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for YatraNepal
+
+Measures
+  - cold start: a fresh interpreter importing app.py (what every gunicorn
+    worker pays on boot)
+  - app creation: create_app() with an in-memory database, as a test
+    fixture would do it
+  - first request: the first request against a fresh app, which is where
+    lazily initialized subsystems are built
+
+Usage: python benchmarks/startup.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def cold_start(runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import app'], cwd=PROJECT_ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def app_creation(runs):
+    from yatra import create_app
+
+    timings = []
+    with tempfile.TemporaryDirectory() as instance_path:
+        for _ in range(runs):
+            start = time.perf_counter()
+            create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'}, instance_path=instance_path)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def first_request(runs):
+    from yatra import create_app, init_db
+
+    timings = []
+    with tempfile.TemporaryDirectory() as instance_path:
+        for _ in range(runs):
+            app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'}, instance_path=instance_path)
+            with app.app_context():
+                init_db()
+                start = time.perf_counter()
+                app.test_client().get('/')
+                timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name, timings):
+    print(f'{name:<16} median {statistics.median(timings) * 1000:8.2f} ms   '
+          f'min {min(timings) * 1000:8.2f} ms   runs {len(timings)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    report('cold start', cold_start(args.runs))
+    report('app creation', app_creation(args.runs * 5))
+    report('first request', first_request(args.runs))
+
+
+if __name__ == '__main__':
+    main()
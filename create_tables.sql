@@ -79,6 +79,85 @@ CREATE TABLE contact (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Archive tables for finished bookings and old contact messages (see yatra/archive.py)
+CREATE TABLE booking_archive (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    booking_type VARCHAR(20) NOT NULL,
+    item_id INTEGER NOT NULL,
+    check_in_date DATE NOT NULL,
+    check_out_date DATE NOT NULL,
+    guests INTEGER DEFAULT 1,
+    total_amount FLOAT NOT NULL,
+    currency VARCHAR(3) DEFAULT 'NPR',
+    payment_status VARCHAR(20) DEFAULT 'pending',
+    booking_status VARCHAR(20) DEFAULT 'confirmed',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    archived_at DATETIME NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES user (id)
+);
+
+CREATE TABLE contact_archive (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(120) NOT NULL,
+    subject VARCHAR(200) NOT NULL,
+    message TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    archived_at DATETIME NOT NULL
+);
+
+-- Normalized amenity/destination/service tags
+CREATE TABLE tag (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind VARCHAR(20) NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    label VARCHAR(100) NOT NULL,
+    UNIQUE (kind, name)
+);
+
+-- Tag associations (hotel amenities, tour destinations and services)
+CREATE TABLE item_tag (
+    item_type VARCHAR(20) NOT NULL,
+    item_id INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL,
+    PRIMARY KEY (item_type, item_id, tag_id),
+    FOREIGN KEY (tag_id) REFERENCES tag (id)
+);
+
+-- Coordinates of hotels and tour waypoints from yatra/gazetteer.csv, mirrored into an R-tree
+CREATE TABLE place (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_type VARCHAR(20) NOT NULL,
+    item_id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    latitude FLOAT NOT NULL,
+    longitude FLOAT NOT NULL
+);
+
+CREATE VIRTUAL TABLE place_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+
+CREATE TRIGGER place_rtree_insert AFTER INSERT ON place BEGIN
+    INSERT INTO place_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+END;
+
+CREATE TRIGGER place_rtree_update AFTER UPDATE ON place BEGIN
+    DELETE FROM place_rtree WHERE id = old.id;
+    INSERT INTO place_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+END;
+
+CREATE TRIGGER place_rtree_delete AFTER DELETE ON place BEGIN
+    DELETE FROM place_rtree WHERE id = old.id;
+END;
+
+-- Exchange rates: units of each currency per NPR, one row per rate change
+CREATE TABLE exchange_rate (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    currency VARCHAR(3) NOT NULL,
+    rate FLOAT NOT NULL,
+    effective_at DATETIME NOT NULL
+);
+
 -- Create indexes for better performance
 CREATE INDEX idx_user_username ON user(username);
 CREATE INDEX idx_user_email ON user(email);
@@ -88,6 +167,10 @@ CREATE INDEX idx_review_user_id ON review(user_id);
 CREATE INDEX idx_review_type ON review(review_type);
 CREATE INDEX idx_hotel_location ON hotel(location);
 CREATE INDEX idx_tour_duration ON tour_package(duration);
+CREATE INDEX idx_item_tag_tag_id ON item_tag(tag_id);
+CREATE INDEX ix_booking_archive_user_id ON booking_archive(user_id);
+CREATE INDEX ix_place_item ON place(item_type, item_id);
+CREATE INDEX ix_exchange_rate_currency ON exchange_rate(currency, effective_at);
 
 -- Insert sample data for testing
 
@@ -95,6 +178,13 @@ CREATE INDEX idx_tour_duration ON tour_package(duration);
 INSERT INTO user (username, email, password_hash, is_admin) VALUES 
 ('admin', 'admin@yatra.com', 'pbkdf2:sha256:600000$your_hash_here', 1);
 
+-- Insert starting exchange rates
+INSERT INTO exchange_rate (currency, rate, effective_at) VALUES
+('USD', 0.0075, CURRENT_TIMESTAMP),
+('INR', 0.625, CURRENT_TIMESTAMP),
+('EUR', 0.0069, CURRENT_TIMESTAMP),
+('CNY', 0.054, CURRENT_TIMESTAMP);
+
 -- Insert sample hotels
 -- INSERT INTO hotel (name, description, location, price_nrp, price_usd, rating, image_url, amenities) VALUES 
 -- ('Dwarika''s Resort', 'Luxury resort with mountain views', 'Pokhara', 15000, 150, 4.5, '/static/images/hotel1.jpg', 'WiFi, Pool, Spa, Restaurant'),
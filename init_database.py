@@ -8,6 +8,8 @@ import sqlite3
 import os
 from werkzeug.security import generate_password_hash
 
+from yatra.versions import VersionStamps
+
 def init_database():
     """Initialize the database with tables and sample data"""
     
@@ -113,6 +115,102 @@ def init_database():
         )
     ''')
     
+    # Create archive tables
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS booking_archive (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            booking_type VARCHAR(20) NOT NULL,
+            item_id INTEGER NOT NULL,
+            check_in_date DATE NOT NULL,
+            check_out_date DATE NOT NULL,
+            guests INTEGER DEFAULT 1,
+            total_amount FLOAT NOT NULL,
+            currency VARCHAR(3) DEFAULT 'NPR',
+            payment_status VARCHAR(20) DEFAULT 'pending',
+            booking_status VARCHAR(20) DEFAULT 'confirmed',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            archived_at DATETIME NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES user (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS contact_archive (
+            id INTEGER PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            email VARCHAR(120) NOT NULL,
+            subject VARCHAR(200) NOT NULL,
+            message TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            archived_at DATETIME NOT NULL
+        )
+    ''')
+    
+    # Create Tag tables
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tag (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind VARCHAR(20) NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            label VARCHAR(100) NOT NULL,
+            UNIQUE (kind, name)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS item_tag (
+            item_type VARCHAR(20) NOT NULL,
+            item_id INTEGER NOT NULL,
+            tag_id INTEGER NOT NULL,
+            PRIMARY KEY (item_type, item_id, tag_id),
+            FOREIGN KEY (tag_id) REFERENCES tag (id)
+        )
+    ''')
+    
+    # Create Place table and its R-tree
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS place (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_type VARCHAR(20) NOT NULL,
+            item_id INTEGER NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            latitude FLOAT NOT NULL,
+            longitude FLOAT NOT NULL
+        )
+    ''')
+
+    cursor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS place_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS place_rtree_insert AFTER INSERT ON place BEGIN
+            INSERT INTO place_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS place_rtree_update AFTER UPDATE ON place BEGIN
+            DELETE FROM place_rtree WHERE id = old.id;
+            INSERT INTO place_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS place_rtree_delete AFTER DELETE ON place BEGIN
+            DELETE FROM place_rtree WHERE id = old.id;
+        END
+    ''')
+    
+    # Create ExchangeRate table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS exchange_rate (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            currency VARCHAR(3) NOT NULL,
+            rate FLOAT NOT NULL,
+            effective_at DATETIME NOT NULL
+        )
+    ''')
+
     # Create indexes for better performance
     print("Creating indexes...")
     indexes = [
@@ -123,7 +221,11 @@ def init_database():
         'CREATE INDEX IF NOT EXISTS idx_review_user_id ON review(user_id)',
         'CREATE INDEX IF NOT EXISTS idx_review_type ON review(review_type)',
         'CREATE INDEX IF NOT EXISTS idx_hotel_location ON hotel(location)',
-        'CREATE INDEX IF NOT EXISTS idx_tour_duration ON tour_package(duration)'
+        'CREATE INDEX IF NOT EXISTS idx_tour_duration ON tour_package(duration)',
+        'CREATE INDEX IF NOT EXISTS idx_item_tag_tag_id ON item_tag(tag_id)',
+        'CREATE INDEX IF NOT EXISTS ix_booking_archive_user_id ON booking_archive(user_id)',
+        'CREATE INDEX IF NOT EXISTS ix_place_item ON place(item_type, item_id)',
+        'CREATE INDEX IF NOT EXISTS ix_exchange_rate_currency ON exchange_rate(currency, effective_at)'
     ]
     
     for index in indexes:
@@ -181,9 +283,47 @@ def init_database():
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', tours)
     
+    # Check if exchange rates exist
+    cursor.execute('SELECT COUNT(*) FROM exchange_rate')
+    rates_count = cursor.fetchone()[0]
+
+    if rates_count == 0:
+        print("Inserting starting exchange rates...")
+        rates = [
+            ('USD', 0.0075),
+            ('INR', 0.625),
+            ('EUR', 0.0069),
+            ('CNY', 0.054)
+        ]
+
+        cursor.executemany('''
+            INSERT INTO exchange_rate (currency, rate, effective_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+        ''', rates)
+
+    # Store USD prices at the current USD rate, as yatra.currency.reprice_catalog() does
+    cursor.execute('''
+        SELECT rate FROM exchange_rate
+        WHERE currency = 'USD' AND effective_at <= CURRENT_TIMESTAMP
+        ORDER BY effective_at DESC, id DESC LIMIT 1
+    ''')
+    usd_rate = cursor.fetchone()
+    repriced = 0
+    if usd_rate:
+        for table in ('hotel', 'tour_package'):
+            cursor.execute(f'''
+                UPDATE {table} SET price_usd = ROUND(price_nrp * ?, 2)
+                WHERE price_usd IS NOT ROUND(price_nrp * ?, 2)
+            ''', (usd_rate[0], usd_rate[0]))
+            repriced += cursor.rowcount
+
     # Commit changes
     conn.commit()
     conn.close()
+
+    if repriced:
+        # Let running workers drop catalog data cached with the old USD prices
+        VersionStamps(os.path.join('instance', 'versions')).bump('catalog')
     
     print(f"Database initialized successfully at {db_path}")
     print("Admin credentials: username=admin, password=admin123")
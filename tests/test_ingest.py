@@ -0,0 +1,163 @@
+"""Tests for the write-behind ingest buffer (yatra.ingest)"""
+
+import fcntl
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+
+from yatra.ingest import TABLES, WriteBuffer, encode
+
+
+def contact(n=0):
+    return {'name': f'visitor {n}', 'email': 'visitor@example.com', 'subject': 'Festival trip',
+            'message': f'message {n}', 'created_at': datetime(2026, 10, 1, 12, 0, n % 60)}
+
+
+def count_rows(engine, kind='contact'):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(TABLES[kind])).scalar()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A file-backed database with no tables, so every insert fails until create_tables() is called"""
+    engine = create_engine('sqlite:///' + str(tmp_path / 'ingest.db'))
+    yield engine
+    engine.dispose()
+
+
+def create_tables(engine):
+    for table in TABLES.values():
+        table.create(engine, checkfirst=True)
+
+
+@pytest.fixture
+def make_buffer(tmp_path, engine):
+    buffers = []
+
+    def make(**options):
+        options = {'batch_size': 2, 'queue_size': 100, 'flush_seconds': 0.05, 'block_seconds': 0.05,
+                   'fsync': False, **options}
+        buffer = WriteBuffer(engine, str(tmp_path / 'ingest'), **options)
+        buffers.append(buffer)
+        return buffer
+
+    yield make
+    for buffer in buffers:
+        if buffer.thread is not None:
+            create_tables(engine)
+            buffer.close()
+
+
+def count_inserts(buffer):
+    """Wrap buffer._insert so the test can see every attempt, failed or not"""
+    attempts = []
+    insert = buffer._insert
+
+    def counted(rows):
+        attempts.append(len(rows))
+        return insert(rows)
+
+    buffer._insert = counted
+    return attempts
+
+
+def test_failing_database_backs_off_and_keeps_rows(engine, make_buffer):
+    buffer = make_buffer()
+    attempts = count_inserts(buffer)
+    for n in range(6):
+        buffer.submit('contact', **contact(n))
+
+    # A full batch is waiting the whole time; without backoff this retried thousands of times
+    time.sleep(0.5)
+    assert 1 <= len(attempts) <= 6
+    assert buffer.waiting() == 6
+    assert len(os.listdir(buffer.directory)) == 2  # the journal and the failed batch, nothing more
+
+    create_tables(engine)
+    buffer.close()
+    assert count_rows(engine) == 6
+    assert os.listdir(buffer.directory) == []
+
+
+def test_failed_batch_counts_against_queue_size(engine, make_buffer):
+    buffer = make_buffer(batch_size=100, queue_size=3, flush_seconds=60)
+    buffer.start()
+    for n in range(3):
+        buffer.submit('contact', **contact(n))
+
+    # The queue is full and the database is failing, so the next post fails instead of queueing
+    with pytest.raises(OperationalError):
+        buffer.submit('contact', **contact(3))
+    assert buffer.stats['blocked'] == 1
+    assert buffer.waiting() == 3
+
+    # Once the database recovers the caller flushes inline and its row is queued behind that batch
+    create_tables(engine)
+    buffer.submit('contact', **contact(4))
+    assert buffer.stats['blocked'] == 2
+    assert count_rows(engine) == 3
+    assert buffer.waiting() == 1
+
+
+def test_backpressure_waits_for_the_flusher(engine, make_buffer):
+    create_tables(engine)
+    buffer = make_buffer(batch_size=4, queue_size=4, flush_seconds=60, block_seconds=5)
+    threads = [threading.Thread(target=buffer.submit, args=('contact',), kwargs=contact(n)) for n in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert buffer.stats['submitted'] == 40
+    assert buffer.stats['blocked'] > 0
+    buffer.close()
+    assert count_rows(engine) == 40
+
+
+def test_recover_replays_orphaned_journal_and_batch(engine, make_buffer):
+    create_tables(engine)
+    buffer = make_buffer()
+    os.makedirs(buffer.directory)
+    orphans = {'999998.log': [contact(1), contact(2)], '999999.3.batch': [contact(3)]}
+    for name, rows in orphans.items():
+        with open(os.path.join(buffer.directory, name), 'w', encoding='utf-8') as f:
+            f.writelines(encode('contact', row) for row in rows)
+
+    assert buffer.recover() == 3
+    assert count_rows(engine) == 3
+    assert os.listdir(buffer.directory) == []
+
+
+def test_recover_skips_journals_of_live_processes(engine, make_buffer):
+    create_tables(engine)
+    buffer = make_buffer()
+    os.makedirs(buffer.directory)
+    path = os.path.join(buffer.directory, '999998.log')
+    with open(path, 'w', encoding='utf-8') as journal:
+        journal.write(encode('contact', contact(1)))
+        journal.flush()
+        # Another worker still owns this journal
+        fcntl.flock(journal, fcntl.LOCK_EX)
+        assert buffer.recover() == 0
+        assert os.path.exists(path)
+
+    assert buffer.recover() == 1
+    assert not os.path.exists(path)
+
+
+def test_start_recovers_orphans(engine, make_buffer):
+    create_tables(engine)
+    buffer = make_buffer()
+    os.makedirs(buffer.directory)
+    with open(os.path.join(buffer.directory, '999998.log'), 'w', encoding='utf-8') as f:
+        f.write(encode('review', {'user_id': 1, 'review_type': 'hotel', 'item_id': 2, 'rating': 5,
+                                  'comment': 'Lovely', 'created_at': datetime(2026, 10, 1)}))
+
+    buffer.start()
+    assert count_rows(engine, 'review') == 1
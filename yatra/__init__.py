@@ -0,0 +1,110 @@
+"""
+YatraNepal application package
+
+create_app() builds a configured Flask application. Blueprints are imported
+inside the factory and heavy subsystems (catalog snapshot, tag and similarity
+indexes) are built on first use, so importing the package and creating an app
+for a test are both cheap.
+"""
+
+import os
+
+from flask import Flask, request
+
+from .extensions import db, login_manager, data_versions
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_app(test_config=None, instance_path=None):
+    app = Flask(__name__, root_path=PROJECT_ROOT,
+                instance_path=instance_path or os.path.join(PROJECT_ROOT, 'instance'))
+
+    if test_config is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///yatra_nepal.db'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
+    if test_config:
+        app.config.update(test_config)
+
+    db.init_app(app)
+    login_manager.init_app(app)
+    configure_templates(app)
+
+    from . import admin, api, auth, booking, catalog, recommendations
+    for module in (auth, catalog, booking, admin, recommendations, api):
+        app.register_blueprint(module.bp)
+
+    @app.context_processor
+    def inject_request():
+        return dict(request=request)
+
+    @app.context_processor
+    def inject_catalog_version():
+        # Part of every catalog card's {% cache %} key
+        return dict(catalog_version=data_versions().get('catalog'))
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables, the default admin user and tag associations"""
+        init_db()
+        print('Database initialized')
+
+    return app
+
+
+def configure_templates(app):
+    """Persist compiled templates across worker restarts and enable {% cache %} fragments.
+
+    Only jinja_options is touched here; Flask still builds the environment on first render.
+    """
+    options = dict(app.jinja_options)
+    options['extensions'] = [*options.get('extensions', ()), 'yatra.fragment_cache.FragmentCacheExtension']
+
+    cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+    if cache_dir:
+        from jinja2 import FileSystemBytecodeCache
+        os.makedirs(cache_dir, exist_ok=True)
+        options['bytecode_cache'] = FileSystemBytecodeCache(cache_dir)
+
+    app.jinja_options = options
+
+
+def init_db():
+    """Create missing tables, the default admin account and exchange rates, and backfill tags and coordinates (needs an app context)"""
+    from werkzeug.security import generate_password_hash
+
+    from .catalog import sync_all_places, sync_all_tags
+    from .currency import current_rates, reprice_catalog, seed_default_rates
+    from .models import User, ItemTag, Place
+
+    db.create_all()
+
+    # Create admin user if not exists
+    admin_user = User.query.filter_by(username='admin').first()
+    if not admin_user:
+        admin_user = User(
+            username='admin',
+            email='admin@yatra.com',
+            password_hash=generate_password_hash('admin123'),
+            is_admin=True
+        )
+        db.session.add(admin_user)
+        db.session.commit()
+
+    # Backfill tags for catalogs created before tags existed
+    if not ItemTag.query.first():
+        sync_all_tags()
+
+    # Locate hotels and tour waypoints for catalogs created before coordinates existed
+    if not Place.query.first():
+        sync_all_places()
+
+    seed_default_rates()
+    # Catalogs seeded or created before USD was derived from the rate still carry hand-entered USD prices
+    if 'USD' in current_rates():
+        reprice_catalog()
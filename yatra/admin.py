@@ -0,0 +1,350 @@
+"""Admin dashboard and catalog/booking management"""
+
+import os
+from datetime import datetime
+
+import click
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
+from flask_login import login_required
+from werkzeug.utils import secure_filename
+
+from .archive import bookings_with_history
+from .auth import admin_required
+from .booking_state import forget_booking_states
+from .bulk import delete_items, set_payment_status
+from .catalog import sync_item_places, sync_item_tags, update_item_suggestions
+from .currency import convert_prices
+from .extensions import db
+from .maintenance import TASKS, maintenance
+from .models import Hotel, TourPackage, Booking, Contact
+
+bp = Blueprint('admin', __name__, url_prefix='/admin', cli_group=None)
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def usd_price(form):
+    """The form's NPR price at the current USD rate; price_usd is never entered by hand"""
+    return convert_prices([float(form['price_nrp'])], 'USD')[0]
+
+
+@bp.route('')
+@login_required
+@admin_required
+def dashboard():
+    hotels = Hotel.query.all()
+    tours = TourPackage.query.all()
+    bookings = Booking.query.all()
+    contacts = Contact.query.all()
+    return render_template('admin/dashboard.html', hotels=hotels, tours=tours, bookings=bookings, contacts=contacts)
+
+@bp.route('/add_hotel', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def add_hotel():
+    if request.method == 'POST':
+        image = request.files['image']
+        if image and allowed_file(image.filename):
+            filename = secure_filename(image.filename)
+            image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+            image.save(image_path)
+            image_url = '/' + image_path  # Path to use in HTML src
+            
+            hotel = Hotel(
+                name=request.form['name'],
+                description=request.form['description'],
+                location=request.form['location'],
+                price_nrp=float(request.form['price_nrp']),
+                price_usd=usd_price(request.form),
+                image_url=image_url,
+                amenities=request.form['amenities']
+            )
+            db.session.add(hotel)
+            db.session.flush()
+            sync_item_tags('hotel', hotel.id, amenity=hotel.amenities)
+            sync_item_places('hotel', hotel.id, hotel.location)
+            db.session.commit()
+            update_item_suggestions('hotel', hotel.id, hotel.name, hotel.location)
+            flash('Hotel added successfully!', 'success')
+            return redirect(url_for('admin.dashboard'))
+        else:
+            flash('Invalid image format. Only PNG, JPG, JPEG, GIF allowed.', 'danger')
+    
+    return render_template('admin/add_hotel.html')
+
+@bp.route('/add_tour', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def add_tour():
+    if request.method == 'POST':
+        image = request.files['image']
+        if image and allowed_file(image.filename):
+            filename = secure_filename(image.filename)
+            image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+            image.save(image_path)
+            image_url = '/' + image_path  # for use in HTML src
+
+            tour = TourPackage(
+                name=request.form['name'],
+                description=request.form['description'],
+                duration=request.form['duration'],
+                price_nrp=float(request.form['price_nrp']),
+                price_usd=usd_price(request.form),
+                image_url=image_url,
+                destinations=request.form['destinations'],
+                included_services=request.form['included_services']
+            )
+            db.session.add(tour)
+            db.session.flush()
+            sync_item_tags('tour', tour.id, destination=tour.destinations, service=tour.included_services)
+            sync_item_places('tour', tour.id, tour.destinations)
+            db.session.commit()
+            update_item_suggestions('tour', tour.id, tour.name, tour.destinations)
+            flash('Tour package added successfully!', 'success')
+            return redirect(url_for('admin.dashboard'))
+        else:
+            flash('Invalid image format. Only PNG, JPG, JPEG, GIF allowed.', 'danger')
+
+    return render_template('admin/add_tour.html')
+
+@bp.route('/hotels')
+@login_required
+@admin_required
+def hotel_list():
+    hotels = Hotel.query.all()
+    return render_template('admin/hotel_list.html', hotels=hotels)
+
+@bp.route('/hotels/edit/<int:id>', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def edit_hotel(id):
+    hotel = Hotel.query.get_or_404(id)
+
+    if request.method == 'POST':
+        hotel.name = request.form['name']
+        hotel.location = request.form['location']
+        hotel.description = request.form['description']
+        hotel.price_nrp = request.form['price_nrp']
+        hotel.price_usd = usd_price(request.form)
+        hotel.amenities = request.form['amenities']
+
+        # Check if a new file is uploaded
+        file = request.files.get('image_file')
+        if file and file.filename != '':
+            filename = secure_filename(file.filename)
+            file_path = os.path.join('static/uploads/hotels', filename)  # adjust path accordingly
+            file.save(file_path)
+            hotel.image_url = url_for('static', filename='uploads/hotels/' + filename)
+            # You can also delete old file here if you want
+
+        # If no new file uploaded, keep existing hotel.image_url as is
+
+        sync_item_tags('hotel', hotel.id, amenity=hotel.amenities)
+        sync_item_places('hotel', hotel.id, hotel.location)
+        db.session.commit()
+        update_item_suggestions('hotel', hotel.id, hotel.name, hotel.location)
+        flash('Hotel updated successfully!', 'success')
+        return redirect(url_for('admin.hotel_list'))
+
+    return render_template('edit_hotel.html', hotel=hotel)
+
+@bp.route('/hotels/delete/<int:id>', methods=['POST'])
+@login_required
+@admin_required
+def delete_hotel(id):  # parameter name changed to 'id'
+    hotel = Hotel.query.get_or_404(id)
+    db.session.delete(hotel)
+    sync_item_tags('hotel', id)
+    sync_item_places('hotel', id)
+    db.session.commit()
+    update_item_suggestions('hotel', id)
+    flash('Hotel deleted successfully!', 'success')
+    return redirect(url_for('admin.hotel_list'))
+
+@bp.route('/hotels/bulk_delete', methods=['POST'])
+@login_required
+@admin_required
+def bulk_delete_hotels():
+    try:
+        count = delete_items('hotel', ids=[int(id) for id in request.form.getlist('ids')],
+                             location=request.form.get('location'))
+        flash(f'Deleted {count} hotel(s).', 'success' if count else 'info')
+    except ValueError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('admin.hotel_list'))
+
+@bp.route('/tours')
+@login_required
+@admin_required
+def tour_list():
+    tours = TourPackage.query.all()
+    return render_template('admin/tour_list.html', tours=tours)
+
+@bp.route('/tours/edit/<int:id>', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def edit_tour(id):
+    tour = TourPackage.query.get_or_404(id)
+    
+    if request.method == 'POST':
+        tour.name = request.form['name']
+        tour.duration = request.form['duration']
+        tour.description = request.form['description']
+        tour.price_nrp = float(request.form['price_nrp'])
+        tour.price_usd = usd_price(request.form)
+        tour.destinations = request.form['destinations']
+        tour.included_services = request.form.get('included_services', '')
+        
+        image = request.files.get('image')
+        if image and image.filename != '':
+            if allowed_file(image.filename):
+                filename = secure_filename(image.filename)
+                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+                image.save(image_path)
+                tour.image_url = '/' + image_path  # adjust if needed
+            else:
+                flash('Invalid image format. Allowed: png, jpg, jpeg, gif', 'danger')
+                return redirect(request.url)
+        
+        sync_item_tags('tour', tour.id, destination=tour.destinations, service=tour.included_services)
+        sync_item_places('tour', tour.id, tour.destinations)
+        db.session.commit()
+        update_item_suggestions('tour', tour.id, tour.name, tour.destinations)
+        flash('Tour package updated successfully!', 'success')
+        return redirect(url_for('admin.tour_list'))
+    
+    return render_template('admin/edit_tour.html', tour=tour)
+
+@bp.route('/tours/delete/<int:id>', methods=['POST'])
+@login_required
+@admin_required
+def delete_tour(id):
+    tour = TourPackage.query.get_or_404(id)
+    db.session.delete(tour)
+    sync_item_tags('tour', id)
+    sync_item_places('tour', id)
+    db.session.commit()
+    update_item_suggestions('tour', id)
+    flash('Tour package deleted successfully!', 'success')
+    return redirect(url_for('admin.tour_list'))
+
+@bp.route('/tours/bulk_delete', methods=['POST'])
+@login_required
+@admin_required
+def bulk_delete_tours():
+    try:
+        count = delete_items('tour', ids=[int(id) for id in request.form.getlist('ids')],
+                             destination=request.form.get('destination'))
+        flash(f'Deleted {count} tour package(s).', 'success' if count else 'info')
+    except ValueError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('admin.tour_list'))
+
+@bp.route('/bookings')
+@login_required
+@admin_required
+def bookings():
+    history = request.args.get('history') == '1'
+    if history:
+        bookings = bookings_with_history()
+    else:
+        bookings = Booking.query.order_by(Booking.created_at.desc()).all()
+    
+    # Get hotel and tour data for each booking
+    for booking in bookings:
+        if booking.booking_type == 'hotel':
+            booking.item_details = Hotel.query.get(booking.item_id)
+        else:
+            booking.item_details = TourPackage.query.get(booking.item_id)
+    
+    return render_template('admin/bookings.html', bookings=bookings, history=history)
+
+@bp.route('/bookings/<int:booking_id>/update', methods=['POST'])
+@login_required
+@admin_required
+def update_booking_status(booking_id):
+    booking = Booking.query.get_or_404(booking_id)
+    new_status = request.form.get('status')
+    
+    if new_status in ['completed', 'pending']:
+        booking.payment_status = new_status
+        db.session.commit()
+        forget_booking_states(booking.user_id)
+        flash(f'Booking #{booking_id} status updated to {new_status}', 'success')
+    else:
+        flash('Invalid status', 'danger')
+    
+    return redirect(url_for('admin.bookings'))
+
+@bp.route('/bookings/bulk_update', methods=['POST'])
+@login_required
+@admin_required
+def bulk_update_booking_status():
+    """Set the payment status of every booking matching the filter form in one statement"""
+    new_status = request.form.get('status')
+    if new_status not in ['completed', 'pending']:
+        flash('Invalid status', 'danger')
+        return redirect(url_for('admin.bookings'))
+
+    try:
+        item_id = request.form.get('item_id')
+        check_in_before = request.form.get('check_in_before')
+        count = set_payment_status(
+            new_status,
+            booking_type=request.form.get('booking_type'),
+            item_id=int(item_id) if item_id else None,
+            payment_status=request.form.get('payment_status'),
+            check_in_before=datetime.strptime(check_in_before, '%Y-%m-%d').date() if check_in_before else None
+        )
+        flash(f'{count} booking(s) updated to {new_status}', 'success' if count else 'info')
+    except ValueError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('admin.bookings'))
+
+@bp.route('/maintenance', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def maintenance_status():
+    runner = maintenance()
+    if request.method == 'POST':
+        task = request.form.get('task')
+        if task and task not in TASKS:
+            flash('Unknown maintenance task', 'danger')
+        else:
+            state = runner.run([task] if task else None)
+            ran = ', '.join(state['ran']) or 'nothing was due'
+            flash(f'Maintenance finished: {ran}', 'success')
+        return redirect(url_for('admin.maintenance_status'))
+
+    state = runner.load_state()
+    conn = runner.connect()
+    try:
+        stats = runner.stats(conn)
+    finally:
+        conn.close()
+    return render_template('admin/maintenance.html', stats=stats, state=state, tasks=TASKS,
+                           intervals=runner.intervals, due=runner.due(state))
+
+@bp.cli.command('db-maintenance')
+@click.option('--task', 'tasks', multiple=True, type=click.Choice(TASKS), help='Run this task now (repeatable)')
+@click.option('--all', 'run_all', is_flag=True, help='Run every task now, due or not')
+@click.option('--setup', is_flag=True, help='Switch to incremental auto-vacuum and WAL (one full VACUUM)')
+def db_maintenance_command(tasks, run_all, setup):
+    """Run due database maintenance tasks; meant to be called from cron"""
+    runner = maintenance()
+    if setup:
+        stats = runner.setup()
+        print(f"auto_vacuum={stats['auto_vacuum']} journal_mode={stats['journal_mode']}")
+
+    state = runner.run(list(TASKS) if run_all else list(tasks) or None)
+    for task in state['ran']:
+        result = state['tasks'][task]
+        print(f"{task:<10} {result['seconds']:>8.3f}s  {result['result']}")
+    before, after = state['before'], state['after']
+    print(f"size {before['size_bytes']} -> {after['size_bytes']} bytes (WAL {after['wal_bytes']}), "
+          f"free pages {before['freelist_count']} -> {after['freelist_count']} "
+          f"({after['fragmentation']}% of {after['page_count']})")
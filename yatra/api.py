@@ -0,0 +1,308 @@
+"""Versioned JSON API"""
+
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+from functools import wraps
+
+from flask import Blueprint, Response, request, session, url_for
+from flask_login import current_user
+
+from . import geo, pricing
+from .catalog import gazetteer, get_suggestion_index, nearby_items
+from .currency import BASE_CURRENCY, current_rates
+from .extensions import db, data_versions
+from .models import Hotel, TourPackage, Booking, Review
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_MAX_QUOTE_LINES = 5000
+API_SUGGEST_LIMIT = 8
+
+HOTEL_FIELDS = ('id', 'name', 'description', 'location', 'price_nrp', 'price_usd', 'rating',
+                'image_url', 'amenities', 'created_at')
+TOUR_FIELDS = ('id', 'name', 'description', 'duration', 'price_nrp', 'price_usd', 'rating',
+               'image_url', 'destinations', 'included_services', 'created_at')
+REVIEW_FIELDS = ('id', 'user_id', 'review_type', 'item_id', 'rating', 'comment', 'created_at')
+BOOKING_FIELDS = ('id', 'user_id', 'booking_type', 'item_id', 'check_in_date', 'check_out_date', 'guests',
+                  'total_amount', 'currency', 'payment_status', 'booking_status', 'created_at')
+
+API_ITEM_MODELS = {'hotel': Hotel, 'tour': TourPackage}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+@bp.errorhandler(ApiError)
+def handle_api_error(error):
+    return api_response({'error': str(error)}, status=error.status)
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+def api_response(payload, status=200):
+    body = json.dumps(payload, separators=(',', ':'), default=_json_default)
+    return Response(body, status=status, mimetype='application/json')
+
+def api_conditional(*scopes, per_user=False, extra=None):
+    """Strong ETag over the request URL and data versions; matching If-None-Match returns 304 before any query.
+
+    extra returns one more string the response depends on, such as today's date.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            parts = [request.full_path, *(data_versions().get(scope) for scope in scopes)]
+            if per_user:
+                # Read the id straight from the session so a 304 never loads the user row
+                parts.append(str(session.get('_user_id')))
+            if extra is not None:
+                parts.append(extra())
+            etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = f(*args, **kwargs)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache' if per_user else 'public, no-cache'
+            return response
+        return decorated_function
+    return decorator
+
+def api_fields(allowed):
+    """Parse ?fields=id,name into a validated tuple of column names"""
+    requested = request.args.get('fields')
+    if not requested:
+        return allowed
+    fields = tuple(field.strip() for field in requested.split(',') if field.strip())
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    if not cursor:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except ValueError:
+        raise ApiError('Invalid cursor')
+
+def api_page(model, allowed_fields, *filters):
+    """One keyset-paginated page of row tuples from model, serialized with only the requested fields"""
+    fields = api_fields(allowed_fields)
+    try:
+        limit = min(max(int(request.args.get('limit', API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError('Invalid limit')
+    after = decode_cursor(request.args.get('cursor'))
+
+    columns = [getattr(model, field) for field in fields]
+    rows = (db.session.query(model.id, *columns)
+            .filter(model.id > after, *filters)
+            .order_by(model.id)
+            .limit(limit + 1)
+            .all())
+
+    next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+    data = [dict(zip(fields, row[1:])) for row in rows[:limit]]
+    return api_response({'data': data, 'next_cursor': next_cursor})
+
+def api_item(model, allowed_fields, item_id):
+    fields = api_fields(allowed_fields)
+    row = db.session.query(*[getattr(model, field) for field in fields]).filter(model.id == item_id).first()
+    if row is None:
+        raise ApiError('Not found', 404)
+    return api_response({'data': dict(zip(fields, row))})
+
+@bp.route('/hotels')
+@api_conditional('catalog')
+def hotels():
+    filters = []
+    if request.args.get('location'):
+        filters.append(Hotel.location == request.args['location'])
+    return api_page(Hotel, HOTEL_FIELDS, *filters)
+
+@bp.route('/hotels/<int:hotel_id>')
+@api_conditional('catalog')
+def hotel(hotel_id):
+    return api_item(Hotel, HOTEL_FIELDS, hotel_id)
+
+@bp.route('/tours')
+@api_conditional('catalog')
+def tours():
+    return api_page(TourPackage, TOUR_FIELDS)
+
+@bp.route('/tours/<int:tour_id>')
+@api_conditional('catalog')
+def tour(tour_id):
+    return api_item(TourPackage, TOUR_FIELDS, tour_id)
+
+@bp.route('/<string:item_type>s/<int:item_id>/reviews')
+@api_conditional('reviews')
+def reviews(item_type, item_id):
+    if item_type not in API_ITEM_MODELS:
+        raise ApiError('Not found', 404)
+    return api_page(Review, REVIEW_FIELDS, Review.review_type == item_type, Review.item_id == item_id)
+
+@bp.route('/bookings')
+@api_conditional('bookings', per_user=True)
+def bookings():
+    if not current_user.is_authenticated:
+        raise ApiError('Authentication required', 401)
+    filters = [] if current_user.is_admin else [Booking.user_id == current_user.id]
+    if request.args.get('status'):
+        filters.append(Booking.payment_status == request.args['status'])
+    return api_page(Booking, BOOKING_FIELDS, *filters)
+
+@bp.route('/availability/<string:item_type>/<int:item_id>')
+@api_conditional('catalog', 'bookings', extra=lambda: date.today().isoformat())
+def availability(item_type, item_id):
+    """Booked date ranges for an item and, with ?check_in=&check_out=, whether that stay overlaps any of them"""
+    model = API_ITEM_MODELS.get(item_type)
+    if model is None or db.session.query(model.id).filter(model.id == item_id).first() is None:
+        raise ApiError('Not found', 404)
+
+    booked = (db.session.query(Booking.check_in_date, Booking.check_out_date)
+              .filter(Booking.booking_type == item_type, Booking.item_id == item_id,
+                      Booking.booking_status == 'confirmed', Booking.check_out_date >= date.today())
+              .order_by(Booking.check_in_date)
+              .all())
+    payload = {'type': item_type, 'item_id': item_id,
+               'booked': [{'check_in': check_in, 'check_out': check_out} for check_in, check_out in booked]}
+
+    if request.args.get('check_in') and request.args.get('check_out'):
+        try:
+            check_in = datetime.strptime(request.args['check_in'], '%Y-%m-%d').date()
+            check_out = datetime.strptime(request.args['check_out'], '%Y-%m-%d').date()
+        except ValueError:
+            raise ApiError('Dates must be YYYY-MM-DD')
+        if check_out <= check_in:
+            raise ApiError('check_out must be after check_in')
+        payload['overlapping'] = sum(1 for start, end in booked if start < check_out and check_in < end)
+
+    return api_response({'data': payload})
+
+@bp.route('/nearby')
+@api_conditional('catalog')
+def nearby():
+    """The k closest hotels/tours to ?lat=&lon= or to a gazetteer place, ?near=Pokhara
+
+    Optional: ?type=hotel|tour, ?k= (default 5, at most API_MAX_PAGE_SIZE), ?max_km=
+    """
+    if request.args.get('near'):
+        located = gazetteer().locate(request.args['near'])
+        if located is None:
+            raise ApiError('Unknown place', 404)
+        _, latitude, longitude = located
+    else:
+        try:
+            latitude, longitude = float(request.args['lat']), float(request.args['lon'])
+        except (KeyError, ValueError):
+            raise ApiError('Pass lat and lon, or near')
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ApiError('lat/lon out of range')
+
+    item_type = request.args.get('type')
+    if item_type and item_type not in API_ITEM_MODELS:
+        raise ApiError('type must be hotel or tour')
+    try:
+        k = min(max(int(request.args.get('k', 5)), 1), API_MAX_PAGE_SIZE)
+        max_km = float(request.args.get('max_km', geo.MAX_RADIUS_KM))
+    except ValueError:
+        raise ApiError('Invalid k or max_km')
+
+    data = [{'type': match_type, 'id': item.id, 'name': item.name, 'place': place_name,
+             'distance_km': round(distance, 2)}
+            for match_type, item, distance, place_name in nearby_items(latitude, longitude, k, item_type, max_km)]
+    return api_response({'data': data, 'origin': {'lat': latitude, 'lon': longitude}})
+
+@bp.route('/suggest')
+@api_conditional('catalog', 'booking_counts')
+def suggest():
+    """Search-box suggestions for ?q=, served from the in-memory prefix index"""
+    try:
+        limit = min(max(int(request.args.get('limit', API_SUGGEST_LIMIT)), 1), API_MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError('Invalid limit')
+
+    data = []
+    for (kind, key), label in get_suggestion_index().suggest(request.args.get('q', ''), limit):
+        if kind == 'hotel':
+            url = url_for('catalog.hotel_detail', hotel_id=key)
+        elif kind == 'tour':
+            url = url_for('catalog.tour_detail', tour_id=key)
+        elif kind == 'location':
+            url = url_for('catalog.hotels', location=label)
+        else:
+            url = url_for('catalog.tours', destination=label)
+        data.append({'kind': kind, 'label': label, 'url': url})
+    return api_response({'data': data})
+
+@bp.route('/rates')
+def rates():
+    """Current exchange rates as units of each currency per NPR"""
+    return api_response({'data': {'base': BASE_CURRENCY, 'rates': current_rates()}})
+
+@bp.route('/quotes', methods=['POST'])
+def quote():
+    """Price items x date ranges x guest counts x currencies in one request.
+
+    Body: {"items": [{"type": "tour", "id": 2}, {"type": "hotel", "id": 3}],
+           "date_ranges": [{"check_in": "2025-10-01", "check_out": "2025-10-05"}],
+           "guests": [1, 2], "currencies": ["NPR", "USD"]}
+    """
+    body = request.get_json(silent=True)
+    if body is None:
+        body = {}
+    if not isinstance(body, dict):
+        raise ApiError('Body must be a JSON object')
+    for field in ('items', 'date_ranges', 'guests', 'currencies'):
+        if field in body and not isinstance(body[field], list):
+            raise ApiError(f'{field} must be a list')
+    try:
+        requested = [(str(entry['type']), int(entry['id'])) for entry in body.get('items', [])]
+        date_ranges = [(datetime.strptime(entry['check_in'], '%Y-%m-%d').date(),
+                        datetime.strptime(entry['check_out'], '%Y-%m-%d').date())
+                       for entry in body.get('date_ranges', [])]
+        guest_counts = [int(guests) for guests in body.get('guests', [1])]
+    except (KeyError, TypeError, ValueError):
+        raise ApiError('items need type and id, date_ranges need check_in and check_out as YYYY-MM-DD')
+    rates = current_rates()
+    currencies = body.get('currencies') or list(pricing.supported_currencies(rates))
+    if not all(isinstance(currency, str) for currency in currencies):
+        raise ApiError('currencies must be currency codes such as "USD"')
+
+    if not requested or not date_ranges or not guest_counts:
+        raise ApiError('items, date_ranges and guests must not be empty')
+    if len(requested) * len(date_ranges) * len(guest_counts) * len(currencies) > API_MAX_QUOTE_LINES:
+        raise ApiError(f'Quote too large: at most {API_MAX_QUOTE_LINES} lines per request')
+
+    # One query per item type, fetching only the price columns
+    prices = {}
+    for item_type, model in API_ITEM_MODELS.items():
+        ids = {item_id for requested_type, item_id in requested if requested_type == item_type}
+        if ids:
+            rows = db.session.query(model.id, model.price_nrp, model.price_usd).filter(model.id.in_(ids)).all()
+            prices.update({(item_type, row.id): row for row in rows})
+
+    missing = [f'{item_type}/{item_id}' for item_type, item_id in requested if (item_type, item_id) not in prices]
+    if missing:
+        raise ApiError(f"Not found: {', '.join(missing)}", 404)
+
+    items = [(item_type, prices[(item_type, item_id)]) for item_type, item_id in requested]
+    try:
+        quote = pricing.quote_matrix(items, date_ranges, guest_counts, currencies, rates)
+    except pricing.PricingError as e:
+        raise ApiError(str(e))
+    return api_response({'data': quote})
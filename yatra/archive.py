@@ -0,0 +1,87 @@
+"""
+Hot/cold archival of finished bookings and old contact messages
+
+Completed bookings whose stay ended more than ARCHIVE_BOOKING_DAYS ago and
+contact messages older than ARCHIVE_CONTACT_DAYS are moved from booking and
+contact into booking_archive and contact_archive, keeping their ids. Each
+batch of ARCHIVE_BATCH_SIZE rows is copied and deleted in a single
+transaction, so an interrupted run never leaves a row in both tables (or in
+neither) and the next run simply carries on with what is left.
+
+The newest row of each hot table always stays put: SQLite hands out
+max(id) + 1 for new rows, so removing it could let a new booking reuse an id
+that already lives in the archive.
+
+Pages only read the hot tables unless they ask for history explicitly through
+bookings_with_history().
+"""
+
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, literal, select
+
+from .extensions import db, data_versions
+from .models import Booking, BookingArchive, Contact, ContactArchive
+
+DEFAULT_BOOKING_DAYS = 365
+DEFAULT_CONTACT_DAYS = 180
+DEFAULT_BATCH_SIZE = 500
+
+
+def move_batch(hot, cold, condition, batch_size):
+    """Move up to batch_size rows matching condition from hot to cold in one transaction"""
+    hot_table, cold_table = hot.__table__, cold.__table__
+    newest = select(func.max(hot_table.c.id)).scalar_subquery()
+    ids = db.session.execute(
+        select(hot_table.c.id)
+        .where(condition, hot_table.c.id < newest)
+        .order_by(hot_table.c.id)
+        .limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    columns = [column.name for column in hot_table.columns]
+    rows = select(*hot_table.columns, literal(datetime.utcnow())).where(hot_table.c.id.in_(ids))
+    try:
+        db.session.execute(cold_table.insert().from_select(columns + ['archived_at'], rows))
+        db.session.execute(hot_table.delete().where(hot_table.c.id.in_(ids)))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(ids)
+
+def archive_history(today=None, booking_days=None, contact_days=None, batch_size=None):
+    """Archive everything past the configured horizons, returning (bookings, contacts) moved"""
+    config = current_app.config
+    today = today or date.today()
+    booking_days = booking_days or config.get('ARCHIVE_BOOKING_DAYS', DEFAULT_BOOKING_DAYS)
+    contact_days = contact_days or config.get('ARCHIVE_CONTACT_DAYS', DEFAULT_CONTACT_DAYS)
+    batch_size = batch_size or config.get('ARCHIVE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+    finished = (Booking.payment_status == 'completed') & \
+               (Booking.check_out_date < today - timedelta(days=booking_days))
+    bookings = 0
+    while moved := move_batch(Booking, BookingArchive, finished, batch_size):
+        # Core statements bypass the session events that normally bump the stamp
+        data_versions().bump('bookings')
+        bookings += moved
+
+    stale = Contact.created_at < datetime.combine(today - timedelta(days=contact_days), datetime.min.time())
+    contacts = 0
+    while moved := move_batch(Contact, ContactArchive, stale, batch_size):
+        contacts += moved
+
+    return bookings, contacts
+
+def bookings_with_history(**criteria):
+    """Hot and archived bookings matching criteria, newest first
+
+    Archived rows are BookingArchive instances and can be told apart by their
+    archived_at timestamp.
+    """
+    hot = Booking.query.filter_by(**criteria).all()
+    cold = BookingArchive.query.filter_by(**criteria).all()
+    return sorted(hot + cold, key=lambda booking: booking.created_at, reverse=True)
@@ -0,0 +1,116 @@
+"""
+In-memory prefix index for search-box suggestions
+
+Every suggestion target (a hotel, a tour, a hotel location or a tour
+destination) is indexed under each word-suffix of its normalized label, so
+'view' finds 'Everest View Hotel' as well as 'everest' does. The keys live in
+a single sorted list of (key, target) tuples; a lookup is one bisect to the
+first key at or after the prefix and a forward walk while keys still start
+with it. Nothing on that path touches the database.
+
+Targets are ranked by booking popularity: a hotel or tour by its own booking
+count, a location or destination by the bookings of every item it belongs to.
+Items can be added, replaced and removed one at a time, which keeps admin
+edits from forcing a full rebuild.
+"""
+
+from bisect import bisect_left, insort
+
+from .tags import normalize_tag, split_tags
+
+# The place each item type contributes a group suggestion for
+GROUP_KINDS = {'hotel': 'location', 'tour': 'destination'}
+
+
+def word_suffixes(label):
+    """'Everest View Hotel' -> ['everest view hotel', 'view hotel', 'hotel']"""
+    words = normalize_tag(label).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.version = None
+        self.entries = []           # sorted (key, target); target is (kind, item_id or normalized name)
+        self.labels = {}            # target -> display label
+        self.members = {}           # group target -> {(item_type, item_id), ...}
+        self.item_targets = {}      # (item_type, item_id) -> [target, ...]
+        self.popularity = {}        # (item_type, item_id) -> booking count
+
+    def load(self, items, popularity, version):
+        """Rebuild from (item_type, item_id, name, place_text) rows and {(item_type, item_id): bookings}"""
+        self.entries = []
+        self.labels = {}
+        self.members = {}
+        self.item_targets = {}
+        self.popularity = dict(popularity)
+        for item_type, item_id, name, place_text in items:
+            self._add_item(item_type, item_id, name, place_text, sort=False)
+        self.entries.sort()
+        self.version = version
+
+    def _add_target(self, target, label, sort):
+        self.labels[target] = label
+        for key in word_suffixes(label):
+            if sort:
+                insort(self.entries, (key, target))
+            else:
+                self.entries.append((key, target))
+
+    def _remove_target(self, target):
+        for key in word_suffixes(self.labels.pop(target)):
+            i = bisect_left(self.entries, (key, target))
+            if i < len(self.entries) and self.entries[i] == (key, target):
+                del self.entries[i]
+
+    def _add_item(self, item_type, item_id, name, place_text, sort=True):
+        item = (item_type, item_id)
+        targets = [item]
+        self._add_target(item, name, sort)
+        for group_name, label in split_tags(place_text):
+            target = (GROUP_KINDS[item_type], group_name)
+            if target not in self.members:
+                self.members[target] = set()
+                self._add_target(target, label, sort)
+            self.members[target].add(item)
+            targets.append(target)
+        self.item_targets[item] = targets
+
+    def remove_item(self, item_type, item_id):
+        item = (item_type, item_id)
+        for target in self.item_targets.pop(item, ()):
+            if target == item:
+                self._remove_target(target)
+                continue
+            members = self.members[target]
+            members.discard(item)
+            if not members:
+                del self.members[target]
+                self._remove_target(target)
+
+    def set_item(self, item_type, item_id, name, place_text):
+        """Add an item or replace its name and places"""
+        self.remove_item(item_type, item_id)
+        self._add_item(item_type, item_id, name, place_text)
+
+    def add_booking(self, item_type, item_id):
+        item = (item_type, item_id)
+        self.popularity[item] = self.popularity.get(item, 0) + 1
+
+    def score(self, target):
+        if target in self.members:
+            return sum(self.popularity.get(item, 0) for item in self.members[target])
+        return self.popularity.get(target, 0)
+
+    def suggest(self, prefix, limit=8):
+        """Return [(target, label), ...] whose words start with prefix, most booked first"""
+        prefix = normalize_tag(prefix)
+        if not prefix:
+            return []
+        matches = set()
+        i = bisect_left(self.entries, (prefix,))
+        while i < len(self.entries) and self.entries[i][0].startswith(prefix):
+            matches.add(self.entries[i][1])
+            i += 1
+        ranked = sorted(matches, key=lambda target: (-self.score(target), self.labels[target]))
+        return [(target, self.labels[target]) for target in ranked[:limit]]
@@ -0,0 +1,184 @@
+"""Booking, payment and the user's booking history"""
+
+from datetime import datetime
+
+import click
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask_login import login_required, current_user
+
+from . import pricing
+from .archive import archive_history, bookings_with_history
+from .booking_state import forget_booking_states, item_booking_status
+from .catalog import record_popularity, record_similarity, record_suggestion_booking
+from .currency import current_rates
+from .extensions import db
+from .models import Hotel, TourPackage, Booking
+
+bp = Blueprint('booking', __name__, cli_group=None)
+
+
+@bp.route('/book/<string:type>/<int:item_id>', methods=['GET', 'POST'])
+@login_required
+def book(type, item_id):
+    if current_user.is_admin:
+        flash('Admins cannot make bookings.', 'warning')
+        return redirect(url_for('admin.dashboard'))
+
+    item = Hotel.query.get_or_404(item_id) if type == 'hotel' else TourPackage.query.get_or_404(item_id)
+    rates = current_rates()
+
+    # Check if user already has an active booking for this item
+    booking_status = item_booking_status(current_user.id, type, item_id)
+    
+    if booking_status == 'completed':
+        flash(f'You already have an active booking for this {type}. Only one booking per {type} is allowed.', 'warning')
+        return redirect(url_for('booking.my_bookings'))
+
+    if request.method == 'POST':
+        check_in = datetime.strptime(request.form['check_in'], '%Y-%m-%d').date()
+        check_out = datetime.strptime(request.form['check_out'], '%Y-%m-%d').date()
+        guests = int(request.form['guests'])
+        currency = request.form['currency']
+
+        if check_in < datetime.now().date():
+            flash('Check-in date cannot be in the past!', 'danger')
+            return redirect(url_for('booking.book', type=type, item_id=item_id))
+        
+        if check_out <= check_in:
+            flash('Check-out date must be after check-in!', 'danger')
+            return redirect(url_for('booking.book', type=type, item_id=item_id))
+
+        # Check if user already has a pending booking for this item
+        if booking_status == 'pending':
+            flash(f'You already have a pending booking for this {type}. Please complete your existing booking first.', 'warning')
+            return redirect(url_for('booking.my_bookings'))
+
+        try:
+            total_amount = pricing.booking_total(type, item, currency, guests, check_in, check_out, rates)
+        except pricing.PricingError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('booking.book', type=type, item_id=item_id))
+        
+        booking = Booking(
+            user_id=current_user.id,
+            booking_type=type,
+            item_id=item_id,
+            check_in_date=check_in,
+            check_out_date=check_out,
+            guests=guests,
+            total_amount=total_amount,
+            currency=currency
+        )
+        db.session.add(booking)
+        db.session.commit()
+        forget_booking_states(current_user.id)
+        record_similarity(current_user.id, type, item_id)
+        record_suggestion_booking(type, item_id)
+        record_popularity('booking', type, item_id)
+
+        session['booking_id'] = booking.id
+        flash('Booking created! Proceed to payment.', 'success')
+        return redirect(url_for('booking.payment'))
+
+    currencies = pricing.supported_currencies(rates)
+    unit_prices = {currency: pricing.unit_price(item, currency, rates) for currency in currencies}
+    return render_template('booking.html', item=item, type=type, currencies=currencies, unit_prices=unit_prices)
+
+@bp.route('/payment', methods=['GET', 'POST'])
+@login_required
+def payment():
+    if current_user.is_admin:
+        flash('Admins cannot make payments.', 'error')
+        return redirect(url_for('admin.dashboard'))
+
+    booking_id = session.get('booking_id')
+    if not booking_id:
+        return redirect(url_for('catalog.index'))
+    
+    booking = Booking.query.get_or_404(booking_id)
+
+    if request.method == 'POST':
+        # Only allow cash payment
+        payment_method = request.form['payment_method']
+        if payment_method == 'cash':
+            booking.payment_status = 'completed'
+            db.session.commit()
+            forget_booking_states(booking.user_id)
+            flash('Payment successful! Please pay cash on arrival.', 'success')
+            return redirect(url_for('booking.my_bookings'))
+        else:
+            flash('Invalid payment method. Only cash is accepted.', 'error')
+            return redirect(url_for('booking.payment'))
+
+    return render_template('payment.html', booking=booking)
+
+@bp.route('/my_bookings')
+@login_required
+def my_bookings():
+    if current_user.is_admin:
+        flash('Admins cannot view user bookings.', 'warning')
+        return redirect(url_for('admin.dashboard'))
+    history = request.args.get('history') == '1'
+    if history:
+        bookings = bookings_with_history(user_id=current_user.id)
+    else:
+        bookings = Booking.query.filter_by(user_id=current_user.id).order_by(Booking.created_at.desc()).all()
+    
+    # Get hotel and tour data for each booking
+    for booking in bookings:
+        if booking.booking_type == 'hotel':
+            booking.item_details = Hotel.query.get(booking.item_id)
+        else:
+            booking.item_details = TourPackage.query.get(booking.item_id)
+    
+    return render_template('my_bookings.html', bookings=bookings, history=history)
+
+@bp.route('/payment_success')
+@login_required
+def payment_success():
+    # Retrieve the booking ID you stored in session
+    booking_id = session.pop('booking_id', None)
+    if not booking_id:
+        flash('No booking found for confirmation.', 'warning')
+        return redirect(url_for('catalog.index'))
+
+    # Lookup and update booking status
+    booking = Booking.query.get(booking_id)
+    if not booking:
+        flash('Booking record not found.', 'danger')
+        return redirect(url_for('catalog.index'))
+
+    # Mark payment as completed
+    booking.payment_status = 'completed'
+    booking.booking_status = 'confirmed'
+    db.session.commit()
+    forget_booking_states(booking.user_id)
+
+    return render_template('payment_success.html', booking=booking)
+
+@bp.route('/payment_failure')
+@login_required
+def payment_failure():
+    # Optionally, you can pop booking_id or keep it for retry
+    booking_id = session.pop('booking_id', None)
+
+    flash('Payment failed or was cancelled. Please try again.', 'danger')
+    return render_template('payment_failure.html', booking_id=booking_id)
+
+@bp.route('/dashboard_user')
+@login_required
+def dashboard_user():
+    if current_user.is_admin:
+        flash('Admins do not have a user dashboard.', 'warning')
+        return redirect(url_for('admin.dashboard'))
+    return render_template('user/dashboard_user.html')  # Create this template
+
+@bp.cli.command('archive-history')
+@click.option('--booking-days', type=int, help='Archive completed bookings that checked out this many days ago')
+@click.option('--contact-days', type=int, help='Archive contact messages older than this many days')
+@click.option('--batch-size', type=int, help='Rows moved per transaction')
+def archive_history_command(booking_days, contact_days, batch_size):
+    """Move finished bookings and old contact messages into the archive tables"""
+    bookings, contacts = archive_history(booking_days=booking_days, contact_days=contact_days, batch_size=batch_size)
+    print(f"Archived {bookings} bookings and {contacts} contact messages")
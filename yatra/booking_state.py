@@ -0,0 +1,72 @@
+"""
+Per-user booking state for catalog pages
+
+Listing, detail and booking pages only need to know whether the signed-in
+user has booked an item and whether that booking is paid. booking_states()
+answers that from a {(item_type, item_id): payment_status} map built with a
+single query and kept per worker until the 'bookings' version stamp changes,
+so browsing costs at most one booking query per stamp instead of one or
+more per page. Handlers that change a user's bookings in this worker also
+drop that user's entry straight away with forget_booking_states().
+"""
+
+from collections import OrderedDict
+
+from .extensions import db, data_versions, lazy_subsystem
+from .models import Booking
+
+# When a user has several bookings for one item, the most settled one wins
+STATUS_RANK = {'pending': 0, 'completed': 1}
+
+
+class BookingStateCache:
+    def __init__(self, size=1024):
+        self.size = size
+        self.entries = OrderedDict()    # user_id -> (version, states), least recently used first
+
+    def get(self, user_id, version):
+        entry = self.entries.get(user_id)
+        if entry is None or entry[0] != version:
+            return None
+        self.entries.move_to_end(user_id)
+        return entry[1]
+
+    def put(self, user_id, version, states):
+        self.entries[user_id] = (version, states)
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def forget(self, user_id):
+        self.entries.pop(user_id, None)
+
+
+@lazy_subsystem
+def booking_state_cache(app):
+    return BookingStateCache(app.config.get('BOOKING_STATE_CACHE_SIZE', 1024))
+
+def booking_states(user_id):
+    """{(item_type, item_id): payment_status} for every booking the user holds"""
+    cache = booking_state_cache()
+    version = data_versions().get('bookings')
+    states = cache.get(user_id, version)
+    if states is None:
+        states = {}
+        rows = db.session.query(Booking.booking_type, Booking.item_id, Booking.payment_status).filter_by(user_id=user_id)
+        for item_type, item_id, status in rows:
+            key = (item_type, item_id)
+            if key not in states or STATUS_RANK.get(status, -1) > STATUS_RANK.get(states[key], -1):
+                states[key] = status
+        cache.put(user_id, version, states)
+    return states
+
+def item_booking_status(user_id, item_type, item_id):
+    """The user's payment status for one item, or None if they have not booked it"""
+    return booking_states(user_id).get((item_type, item_id))
+
+def item_booking_states(user_id, item_type):
+    """{item_id: payment_status} for one item type, as the listing pages use it"""
+    return {item_id: status for (kind, item_id), status in booking_states(user_id).items() if kind == item_type}
+
+def forget_booking_states(user_id):
+    booking_state_cache().forget(user_id)
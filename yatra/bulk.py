@@ -0,0 +1,78 @@
+"""
+Set-based admin operations
+
+Each function applies one change to every row matching a filter, with a
+single UPDATE or DELETE per table inside one transaction, and returns how
+many rows it touched. Bulk statements skip the ORM session events, so the
+version stamps those events would have bumped are bumped here, once, after
+the commit.
+"""
+
+from sqlalchemy import func, select
+
+from .catalog import update_item_suggestions
+from .extensions import db, data_versions
+from .models import Hotel, TourPackage, Booking, Tag, ItemTag, Place
+from .tags import normalize_tag
+
+ITEM_MODELS = {'hotel': Hotel, 'tour': TourPackage}
+
+
+def set_payment_status(status, booking_type=None, item_id=None, payment_status=None, check_in_before=None):
+    """Set payment_status on every matching booking, e.g. all pending hotel 3 stays checking in before a date"""
+    criteria = []
+    if booking_type:
+        criteria.append(Booking.booking_type == booking_type)
+    if item_id is not None:
+        criteria.append(Booking.item_id == item_id)
+    if payment_status:
+        criteria.append(Booking.payment_status == payment_status)
+    if check_in_before:
+        criteria.append(Booking.check_in_date < check_in_before)
+    if not criteria:
+        raise ValueError('Choose at least one filter')
+
+    try:
+        count = (Booking.query
+                 .filter(*criteria, Booking.payment_status != status)
+                 .update({Booking.payment_status: status}, synchronize_session=False))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    if count:
+        data_versions().bump('bookings')
+    return count
+
+def delete_items(item_type, ids=(), location=None, destination=None):
+    """Delete matching hotels or tours together with their tags and coordinates"""
+    model = ITEM_MODELS[item_type]
+    criteria = []
+    if ids:
+        criteria.append(model.id.in_(ids))
+    if location and item_type == 'hotel':
+        criteria.append(func.lower(Hotel.location) == location.strip().lower())
+    if destination and item_type == 'tour':
+        tagged = (select(ItemTag.item_id).join(Tag, Tag.id == ItemTag.tag_id)
+                  .where(ItemTag.item_type == 'tour', Tag.kind == 'destination',
+                         Tag.name == normalize_tag(destination)))
+        criteria.append(model.id.in_(tagged))
+    if not criteria:
+        raise ValueError('Choose at least one filter')
+
+    deleted = db.session.scalars(select(model.id).where(*criteria)).all()
+    if not deleted:
+        return 0
+    try:
+        ItemTag.query.filter(ItemTag.item_type == item_type, ItemTag.item_id.in_(deleted)).delete(synchronize_session=False)
+        Place.query.filter(Place.item_type == item_type, Place.item_id.in_(deleted)).delete(synchronize_session=False)
+        model.query.filter(model.id.in_(deleted)).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    data_versions().bump('catalog')
+    for item_id in deleted:
+        update_item_suggestions(item_type, item_id)
+    return len(deleted)
@@ -0,0 +1,472 @@
+"""Public catalog pages plus the indexes that back them"""
+
+import os
+from datetime import timezone
+from types import SimpleNamespace
+
+import click
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
+from flask_login import login_required, current_user
+
+from . import catalog_snapshot, geo
+from .autocomplete import PrefixIndex
+from .booking_state import item_booking_states, item_booking_status
+from .catalog_snapshot import CatalogSnapshot
+from .currency import current_rates, reprice_catalog, set_rate
+from .geo import Gazetteer
+from .ingest import ingest, ingest_buffer
+from .leaderboard import HALF_LIFE, Leaderboard
+from .extensions import db, data_versions, lazy_subsystem
+from .models import Hotel, TourPackage, Booking, BookingArchive, Review, Tag, ItemTag, Place
+from .similarity import SimilarityIndex
+from .tags import TagIndex, normalize_tag, split_tags
+
+bp = Blueprint('catalog', __name__, cli_group=None)
+
+
+# "Travellers also booked" similarity index
+@lazy_subsystem
+def similarity_index(app):
+    return SimilarityIndex(os.path.join(app.instance_path, 'similar_items.bin'))
+
+def similarity_interactions():
+    """(user_id, item_type, item_id) for every booking, archived or not, and positive review"""
+    bookings = db.session.query(Booking.user_id, Booking.booking_type, Booking.item_id)
+    archived = db.session.query(BookingArchive.user_id, BookingArchive.booking_type, BookingArchive.item_id)
+    reviews = db.session.query(Review.user_id, Review.review_type, Review.item_id).filter(Review.rating >= 4)
+    return bookings.union(archived, reviews).all()
+
+def rebuild_similarity_index():
+    similarity_index().build(similarity_interactions())
+
+def get_similarity_index():
+    """Return the index with every worker's new interactions folded in; built from the database only once"""
+    index = similarity_index()
+    if not index.catch_up():
+        rebuild_similarity_index()
+    return index
+
+def record_similarity(user_id, item_type, item_id):
+    """Share a new booking/review with every worker's index through the interaction log"""
+    index = get_similarity_index()
+    if not index.knows(user_id, item_type, item_id):
+        index.append(user_id, item_type, item_id)
+        index.catch_up()
+
+def similar_items(item_type, item_id, limit=4):
+    """Return [(item_type, item), ...] of items most often booked alongside this one"""
+    index = get_similarity_index()
+    neighbours = index.similar(item_type, item_id, limit=limit)
+    hotel_ids = [other_id for other_type, other_id, _ in neighbours if other_type == 'hotel']
+    tour_ids = [other_id for other_type, other_id, _ in neighbours if other_type == 'tour']
+    hotels = {h.id: h for h in Hotel.query.filter(Hotel.id.in_(hotel_ids)).all()} if hotel_ids else {}
+    tours = {t.id: t for t in TourPackage.query.filter(TourPackage.id.in_(tour_ids)).all()} if tour_ids else {}
+
+    items = []
+    for other_type, other_id, _ in neighbours:
+        item = (hotels if other_type == 'hotel' else tours).get(other_id)
+        if item:
+            items.append((other_type, item))
+    return items
+
+# Normalized amenity/destination/service tags
+@lazy_subsystem
+def tag_index(app):
+    return TagIndex()
+
+def sync_item_tags(item_type, item_id, **tag_text):
+    """Replace an item's tags, e.g. sync_item_tags('hotel', 3, amenity='WiFi, Pool')"""
+    ItemTag.query.filter_by(item_type=item_type, item_id=item_id).delete()
+    # The bulk delete skips the session events, so make sure the commit bumps the stamp
+    db.session.info.setdefault('changed_scopes', set()).add('catalog')
+    for kind, text in tag_text.items():
+        for name, label in split_tags(text):
+            tag = Tag.query.filter_by(kind=kind, name=name).first()
+            if not tag:
+                tag = Tag(kind=kind, name=name, label=label)
+                db.session.add(tag)
+                db.session.flush()
+            db.session.add(ItemTag(item_type=item_type, item_id=item_id, tag_id=tag.id))
+
+def sync_all_tags():
+    for hotel in Hotel.query.all():
+        sync_item_tags('hotel', hotel.id, amenity=hotel.amenities)
+    for tour in TourPackage.query.all():
+        sync_item_tags('tour', tour.id, destination=tour.destinations, service=tour.included_services)
+    db.session.commit()
+
+def get_tag_index():
+    """Return the tag index, reloading it if any worker has changed item tags"""
+    index = tag_index()
+    version = data_versions().get('catalog')
+    if version != index.version:
+        tags = db.session.query(Tag.id, Tag.kind, Tag.name).all()
+        item_tags = db.session.query(ItemTag.item_type, ItemTag.item_id, ItemTag.tag_id).all()
+        index.load(tags, item_tags, version)
+    return index
+
+# Shared memory-mapped catalog snapshot
+@lazy_subsystem
+def catalog_state(app):
+    # by_rating: item type -> (snapshot table, its rows best rated first), see rows_by_rating()
+    return SimpleNamespace(path=os.path.join(app.instance_path, 'catalog.snapshot'), snapshot=None, by_rating={})
+
+def publish_catalog_snapshot(version):
+    tables = {}
+    for name, model in (('hotel', Hotel), ('tour', TourPackage)):
+        columns = [getattr(model, column) for column, _ in catalog_snapshot.TABLES[name]]
+        tables[name] = db.session.query(*columns).order_by(model.id).all()
+    catalog_snapshot.write_snapshot(catalog_state().path, version, tables)
+
+def get_catalog():
+    """Return the mapped catalog snapshot, republishing it if the catalog changed since it was written"""
+    state = catalog_state()
+    version = data_versions().get('catalog')
+    if state.snapshot is None or state.snapshot.version != version:
+        snapshot = CatalogSnapshot.open(state.path)
+        # Publish (again, once, if the fresh file cannot be mapped, e.g. a write cut short by a full disk)
+        for _ in range(2):
+            if snapshot is not None and snapshot.version == version:
+                break
+            publish_catalog_snapshot(version)
+            snapshot = CatalogSnapshot.open(state.path)
+        if snapshot is None:
+            raise RuntimeError(f'Could not map the catalog snapshot at {state.path}')
+        state.snapshot = snapshot
+    return state.snapshot
+
+def rows_by_rating(item_type):
+    """Snapshot rows of one type, best rated first, sorted once per catalog version"""
+    table = get_catalog().tables[item_type]
+    state = catalog_state()
+    cached = state.by_rating.get(item_type)
+    if cached is None or cached[0] is not table:
+        cached = state.by_rating[item_type] = (table, sorted(table, key=lambda row: row.rating, reverse=True))
+    return cached[1]
+
+# Coordinates and proximity search
+@lazy_subsystem
+def gazetteer(app):
+    return Gazetteer.load(app.config.get('GAZETTEER_PATH', os.path.join(os.path.dirname(__file__), 'gazetteer.csv')))
+
+def sync_item_places(item_type, item_id, place_text=None):
+    """Replace an item's coordinates, e.g. sync_item_places('tour', 2, 'Lukla, Namche Bazaar')
+
+    Names the gazetteer does not know are skipped.
+    """
+    Place.query.filter_by(item_type=item_type, item_id=item_id).delete()
+    for name, _ in split_tags(place_text):
+        located = gazetteer().locate(name)
+        if located:
+            label, latitude, longitude = located
+            db.session.add(Place(item_type=item_type, item_id=item_id, name=label,
+                                 latitude=latitude, longitude=longitude))
+
+def sync_all_places():
+    for hotel in Hotel.query.all():
+        sync_item_places('hotel', hotel.id, hotel.location)
+    for tour in TourPackage.query.all():
+        sync_item_places('tour', tour.id, tour.destinations)
+    db.session.commit()
+
+def nearby_items(latitude, longitude, k, item_type=None, max_km=geo.MAX_RADIUS_KM, exclude=()):
+    """Return [(item_type, item, distance_km, place_name), ...] for the k closest catalog items"""
+    catalog = get_catalog()
+    items = []
+    for match_type, match_id, distance, place_name in geo.nearest(db.session, latitude, longitude, k,
+                                                                  item_type, max_km, exclude):
+        item = catalog.get(match_type, match_id)
+        if item:
+            items.append((match_type, item, distance, place_name))
+    return items
+
+def hotels_near_tour(tour_id, limit=4):
+    """Return [(hotel, distance_km, waypoint), ...] for hotels within NEARBY_HOTEL_KM of any of the tour's waypoints"""
+    max_km = current_app.config.get('NEARBY_HOTEL_KM', 30)
+    closest = {}
+    for waypoint in Place.query.filter_by(item_type='tour', item_id=tour_id).all():
+        for _, hotel, distance, _ in nearby_items(waypoint.latitude, waypoint.longitude, limit, 'hotel', max_km):
+            if hotel.id not in closest or distance < closest[hotel.id][1]:
+                closest[hotel.id] = (hotel, distance, waypoint.name)
+    return sorted(closest.values(), key=lambda match: match[1])[:limit]
+
+# Search-box suggestions
+@lazy_subsystem
+def suggestion_index(app):
+    return PrefixIndex()
+
+def suggestion_version():
+    # Payments, status updates and archiving leave booking counts alone, so only new bookings count
+    versions = data_versions()
+    return versions.get('catalog'), versions.get('booking_counts')
+
+def get_suggestion_index():
+    """Return the suggestion index, rebuilding it if any worker changed the catalog or added bookings"""
+    index = suggestion_index()
+    version = suggestion_version()
+    if version != index.version:
+        catalog = get_catalog()
+        items = [('hotel', hotel.id, hotel.name, hotel.location) for hotel in catalog.hotels.rows()]
+        items += [('tour', tour.id, tour.name, tour.destinations) for tour in catalog.tours.rows()]
+        popularity = {}
+        for model in (Booking, BookingArchive):
+            counts = (db.session.query(model.booking_type, model.item_id, db.func.count())
+                      .group_by(model.booking_type, model.item_id))
+            for item_type, item_id, count in counts:
+                popularity[(item_type, item_id)] = popularity.get((item_type, item_id), 0) + count
+        index.load(items, popularity, version)
+    return index
+
+def update_item_suggestions(item_type, item_id, name=None, place_text=None):
+    """Fold a committed admin edit into this worker's index; pass no name for a deletion"""
+    index = suggestion_index()
+    if index.version is None:
+        return
+    if name is None:
+        index.remove_item(item_type, item_id)
+    else:
+        index.set_item(item_type, item_id, name, place_text)
+    index.version = suggestion_version()
+
+def record_suggestion_booking(item_type, item_id):
+    """Count a committed booking towards this worker's popularity ranking"""
+    index = suggestion_index()
+    if index.version is None:
+        return
+    index.add_booking(item_type, item_id)
+    index.version = suggestion_version()
+
+# Time-decayed "trending" leaderboards
+@lazy_subsystem
+def leaderboard(app):
+    board = Leaderboard(os.path.join(app.instance_path, 'leaderboard.bin'),
+                        half_life=app.config.get('LEADERBOARD_HALF_LIFE', HALF_LIFE),
+                        sync_seconds=app.config.get('LEADERBOARD_SYNC_SECONDS', 60.0))
+    return board
+
+def popularity_events():
+    """(event, item_type, item_id, timestamp) for every booking, archived or not, and review"""
+    rows = [('booking', *row) for model in (Booking, BookingArchive)
+            for row in db.session.query(model.booking_type, model.item_id, model.created_at)]
+    rows += [('review', *row) for row in db.session.query(Review.review_type, Review.item_id, Review.created_at)]
+    return [(event, item_type, item_id, created_at.replace(tzinfo=timezone.utc).timestamp())
+            for event, item_type, item_id, created_at in rows if created_at]
+
+def get_leaderboard():
+    """Return the leaderboard, seeding it from bookings and reviews the first time any worker uses it"""
+    board = leaderboard()
+    if board.synced_at is None and not os.path.exists(board.path):
+        board.rebuild(popularity_events())
+    else:
+        board.maybe_sync()
+    return board
+
+def record_popularity(event, item_type, item_id):
+    """Count a view, review or committed booking towards the item's trending score"""
+    get_leaderboard().record(event, item_type, item_id)
+
+def trending(item_type, limit=6, fill=True):
+    """The most popular catalog rows right now, topped up with the best rated when fill is set"""
+    table = get_catalog().tables[item_type]
+    items = [row for row in (table.get(item_id) for item_id, _ in get_leaderboard().leaders(item_type)) if row]
+    items = items[:limit]
+    if fill and len(items) < limit:
+        seen = {item.id for item in items}
+        for row in rows_by_rating(item_type):
+            if len(items) >= limit:
+                break
+            if row.id not in seen:
+                items.append(row)
+    return items
+
+@bp.cli.command('build-catalog')
+def build_catalog_command():
+    """Republish the shared catalog snapshot from the database"""
+    publish_catalog_snapshot(data_versions().get('catalog'))
+    catalog = CatalogSnapshot.open(catalog_state().path)
+    print(f"Catalog snapshot with {len(catalog.hotels)} hotels and {len(catalog.tours)} tours at {catalog_state().path}")
+
+@bp.cli.command('sync-tags')
+def sync_tags_command():
+    """Rebuild tag associations from the free-text amenity/destination/service columns"""
+    sync_all_tags()
+    print(f"Synced {ItemTag.query.count()} item tags over {Tag.query.count()} distinct tags")
+
+@bp.cli.command('sync-places')
+def sync_places_command():
+    """Rebuild hotel and tour waypoint coordinates from the gazetteer"""
+    sync_all_places()
+    print(f"Located {Place.query.count()} hotels and tour waypoints")
+
+@bp.cli.command('set-rate')
+@click.argument('currency')
+@click.argument('rate', type=float)
+@click.option('--effective', type=click.DateTime(), help='When the rate takes effect (default: now)')
+def set_rate_command(currency, rate, effective):
+    """Record how many units of CURRENCY one NPR buys, e.g. `flask set-rate INR 0.625`"""
+    try:
+        set_rate(currency, rate, effective)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(', '.join(f'{code} {value:g}' for code, value in sorted(current_rates().items())))
+
+@bp.cli.command('reprice-catalog')
+def reprice_catalog_command():
+    """Recompute every stored USD price from the NPR price and the current USD rate"""
+    try:
+        count = reprice_catalog()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(f"Repriced {count} hotels and tours at {current_rates()['USD']:g} USD per NPR")
+
+@bp.cli.command('flush-ingest')
+def flush_ingest_command():
+    """Write queued reviews/contact messages and replay journals left by stopped workers"""
+    count = ingest_buffer().recover()
+    print(f'Replayed {count} journaled rows')
+
+@bp.cli.command('rebuild-leaderboard')
+def rebuild_leaderboard_command():
+    """Recompute trending scores from bookings and reviews (detail-page views are dropped)"""
+    events = popularity_events()
+    leaderboard().rebuild(events)
+    print(f"Leaderboard rebuilt from {len(events)} bookings and reviews at {leaderboard().path}")
+
+@bp.cli.command('build-similarity')
+def build_similarity_command():
+    """Rebuild the "travellers also booked" index from bookings and reviews and compact its log"""
+    rebuild_similarity_index()
+    index = similarity_index()
+    print(f"Similarity index built for {len(index.keys)} items at {index.path}")
+
+# Routes
+@bp.route('/')
+def index():
+    return render_template('index.html', hotels=trending('hotel'), tours=trending('tour'))
+
+@bp.route('/hotels')
+@login_required
+def hotels():
+    if current_user.is_admin:
+        flash('Admins cannot access user hotel listings.', 'warning')
+        return redirect(url_for('admin.dashboard'))
+    hotels = get_catalog().hotels.rows()
+
+    # Optional ?amenity=WiFi&amenity=Pool filter
+    amenities = request.args.getlist('amenity')
+    if amenities:
+        index = get_tag_index()
+        mask = index.mask('amenity', amenities)
+        hotels = [hotel for hotel in hotels if index.matches_all('hotel', hotel.id, mask)]
+
+    # Optional ?location=Pokhara filter, as linked from search suggestions
+    location = request.args.get('location')
+    if location:
+        location = normalize_tag(location)
+        hotels = [hotel for hotel in hotels if location in (name for name, _ in split_tags(hotel.location))]
+    
+    # Payment status of the user's existing hotel bookings
+    user_bookings = item_booking_states(current_user.id, 'hotel')
+    
+    return render_template('hotels.html', hotels=hotels, user_bookings=user_bookings)
+
+@bp.route('/hotel/<int:hotel_id>')
+@login_required
+def hotel_detail(hotel_id):
+    if current_user.is_admin:
+        flash('Admins cannot access user hotel details.', 'warning')
+        return redirect(url_for('admin.dashboard'))
+    hotel = Hotel.query.get_or_404(hotel_id)
+    reviews = Review.query.filter_by(review_type='hotel', item_id=hotel_id).all()
+    record_popularity('view', 'hotel', hotel_id)
+    
+    # Payment status of the user's existing booking for this hotel, if any
+    booking_status = item_booking_status(current_user.id, 'hotel', hotel_id)
+    
+    return render_template('hotel_detail.html', hotel=hotel, reviews=reviews, booking_status=booking_status,
+                           similar_items=similar_items('hotel', hotel_id))
+
+@bp.route('/tours')
+@login_required
+def tours():
+    if current_user.is_admin:
+        flash('Admins cannot access user tour listings.', 'warning')
+        return redirect(url_for('admin.dashboard'))
+    tours = get_catalog().tours.rows()
+
+    # Optional ?destination=Pokhara filter
+    destinations = request.args.getlist('destination')
+    if destinations:
+        index = get_tag_index()
+        mask = index.mask('destination', destinations)
+        tours = [tour for tour in tours if index.matches_all('tour', tour.id, mask)]
+
+    # The three most popular tours get a badge; ?sort=trending lists by popularity
+    ranking = [item_id for item_id, _ in get_leaderboard().leaders('tour')]
+    trending_ids = set(ranking[:3])
+    if request.args.get('sort') == 'trending':
+        rank = {item_id: i for i, item_id in enumerate(ranking)}
+        tours = sorted(tours, key=lambda tour: rank.get(tour.id, len(rank)))
+    
+    # Payment status of the user's existing tour bookings
+    user_bookings = item_booking_states(current_user.id, 'tour')
+    
+    return render_template('tours.html', tours=tours, user_bookings=user_bookings, trending_ids=trending_ids)
+
+@bp.route('/tour/<int:tour_id>')
+@login_required
+def tour_detail(tour_id):
+    if current_user.is_admin:
+        flash('Admins cannot access user tour details.', 'warning')
+        return redirect(url_for('admin.dashboard'))
+    tour = TourPackage.query.get_or_404(tour_id)
+    reviews = Review.query.filter_by(review_type='tour', item_id=tour_id).all()
+    record_popularity('view', 'tour', tour_id)
+    
+    # Payment status of the user's existing booking for this tour, if any
+    booking_status = item_booking_status(current_user.id, 'tour', tour_id)
+    
+    return render_template('tour_detail.html', tour=tour, reviews=reviews, booking_status=booking_status,
+                           similar_items=similar_items('tour', tour_id), nearby_hotels=hotels_near_tour(tour_id))
+
+@bp.route('/add_review', methods=['POST'])
+@login_required
+def add_review():
+    if current_user.is_admin:
+        flash('Admins cannot add reviews.', 'warning')
+        return redirect(url_for('admin.dashboard'))
+
+    review_type = request.form['review_type']
+    item_id = int(request.form['item_id'])
+    rating = int(request.form['rating'])
+    comment = request.form['comment']
+    
+    ingest('review',
+        user_id=current_user.id,
+        review_type=review_type,
+        item_id=item_id,
+        rating=rating,
+        comment=comment
+    )
+    if rating >= 4:
+        record_similarity(current_user.id, review_type, item_id)
+    record_popularity('review', review_type, item_id)
+    
+    flash('Review added successfully! It will appear on the page in a moment.', 'success')
+    return redirect(request.referrer)
+
+@bp.route('/contact', methods=['GET', 'POST'])
+def contact():
+    if request.method == 'POST':
+        name = request.form['name']
+        email = request.form['email']
+        subject = request.form['subject']
+        message = request.form['message']
+        
+        ingest('contact', name=name, email=email, subject=subject, message=message)
+        
+        flash('Message sent successfully!', 'success')
+        return redirect(url_for('catalog.contact'))
+    
+    return render_template('contact.html')
@@ -0,0 +1,209 @@
+"""
+Shared, memory-mapped catalog snapshot for YatraNepal
+
+Hotels and tour packages are small and read far more often than they are
+written. Instead of every worker process re-reading them through its own ORM
+session, the catalog is written once into a compact columnar binary file and
+every worker maps that file read-only. The operating system shares the mapped
+pages between processes, so the catalog occupies memory once per host.
+
+File layout (little-endian, every section 8-byte aligned):
+    header     magic, format version, catalog version token, table count
+    directory  per table: row count, then one section offset per column
+    columns    numeric columns as packed int64/float64 arrays;
+               string columns as row_count + 1 int64 offsets into the string table
+    strings    UTF-8 string table shared by all string columns
+
+Rows are sorted by id, so lookups by id are a binary search over the id column.
+"""
+
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+
+FILE_MAGIC = b'YNCS'
+FILE_VERSION = 1
+HEADER = struct.Struct('<4sH2x32sQ')
+SECTION = struct.Struct('<Q')
+
+# Column order is part of the file format; bump FILE_VERSION when it changes
+TABLES = {
+    'hotel': (
+        ('id', 'q'), ('price_nrp', 'd'), ('price_usd', 'd'), ('rating', 'd'),
+        ('name', 's'), ('description', 's'), ('location', 's'), ('image_url', 's'), ('amenities', 's'),
+    ),
+    'tour': (
+        ('id', 'q'), ('price_nrp', 'd'), ('price_usd', 'd'), ('rating', 'd'),
+        ('name', 's'), ('description', 's'), ('duration', 's'), ('image_url', 's'),
+        ('destinations', 's'), ('included_services', 's'),
+    ),
+}
+
+
+def _pad(data):
+    return data + b'\0' * (-len(data) % 8)
+
+
+def write_snapshot(path, version, tables):
+    """Publish a snapshot atomically.
+
+    tables maps each name in TABLES to a list of row tuples in that table's
+    column order, sorted by id.
+    """
+    directory_size = sum(SECTION.size * (1 + len(columns)) for columns in TABLES.values())
+    offset = HEADER.size + directory_size
+
+    directory = []
+    sections = []
+    strings = bytearray()
+    string_columns = []  # (section index, encoded values) resolved once strings are laid out
+
+    for name, columns in TABLES.items():
+        rows = tables.get(name, [])
+        directory.append(len(rows))
+        for i, (column, kind) in enumerate(columns):
+            values = [row[i] for row in rows]
+            if kind == 's':
+                encoded = [(value or '').encode('utf-8') for value in values]
+                string_columns.append((len(sections), encoded))
+                data = b'\0' * (SECTION.size * (len(rows) + 1))
+            else:
+                data = struct.pack(f'<{len(values)}{kind}', *(value or 0 for value in values))
+            directory.append(offset)
+            sections.append(_pad(data))
+            offset += len(sections[-1])
+
+    for section_index, encoded in string_columns:
+        offsets = [len(strings)]
+        for value in encoded:
+            strings += value
+            offsets.append(len(strings))
+        sections[section_index] = _pad(struct.pack(f'<{len(offsets)}q', *offsets))
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(FILE_MAGIC, FILE_VERSION, version.encode('ascii'), len(TABLES)))
+        f.write(struct.pack(f'<{len(directory)}Q', *directory))
+        for section in sections:
+            f.write(section)
+        f.write(bytes(strings))
+    os.replace(tmp_path, path)
+
+
+class SnapshotRow:
+    """Read-only row view; attribute access decodes the value from the mapping"""
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getattr__(self, name):
+        try:
+            return self._table.value(name, self._index)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        return f'<{self._table.name} {self.id} (snapshot)>'
+
+
+class SnapshotTable:
+    def __init__(self, name, row_count, columns, strings):
+        self.name = name
+        self.row_count = row_count
+        self.columns = columns  # column -> (kind, memoryview over the mapping)
+        self.strings = strings
+
+    def __len__(self):
+        return self.row_count
+
+    def __iter__(self):
+        return (SnapshotRow(self, i) for i in range(self.row_count))
+
+    def rows(self, limit=None):
+        return [SnapshotRow(self, i) for i in range(min(self.row_count, limit or self.row_count))]
+
+    def value(self, column, index):
+        kind, view = self.columns[column]
+        if kind != 's':
+            return view[index]
+        return str(self.strings[view[index]:view[index + 1]], 'utf-8')
+
+    def column(self, column):
+        """Zero-copy memoryview over a numeric column"""
+        kind, view = self.columns[column]
+        if kind == 's':
+            raise TypeError(f'{column} is a string column')
+        return view
+
+    def get(self, item_id):
+        ids = self.columns['id'][1]
+        pos = bisect_left(ids, item_id)
+        if pos < self.row_count and ids[pos] == item_id:
+            return SnapshotRow(self, pos)
+        return None
+
+
+class CatalogSnapshot:
+    def __init__(self, version, tables, mapping):
+        self.version = version
+        self.tables = tables
+        self._mapping = mapping
+
+    @classmethod
+    def open(cls, path):
+        """Map a snapshot file; returns None if it is missing or unreadable"""
+        try:
+            with open(path, 'rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            magic, file_version, version, table_count = HEADER.unpack_from(mapping, 0)
+            if magic != FILE_MAGIC or file_version != FILE_VERSION or table_count != len(TABLES):
+                return None
+
+            buffer = memoryview(mapping)
+            position = HEADER.size
+            layout = []
+            for name, columns in TABLES.items():
+                row_count, *offsets = struct.unpack_from(f'<{1 + len(columns)}Q', mapping, position)
+                position += SECTION.size * (1 + len(columns))
+                layout.append((name, columns, row_count, offsets))
+
+            strings_start = position
+            for name, columns, row_count, offsets in layout:
+                for (column, kind), offset in zip(columns, offsets):
+                    end = offset + SECTION.size * (row_count + 1 if kind == 's' else row_count)
+                    strings_start = max(strings_start, end + (-end % 8))
+            strings = buffer[strings_start:]
+
+            tables = {}
+            for name, columns, row_count, offsets in layout:
+                views = {}
+                for (column, kind), offset in zip(columns, offsets):
+                    count = row_count + 1 if kind == 's' else row_count
+                    view = buffer[offset:offset + SECTION.size * count].cast('q' if kind == 's' else kind)
+                    views[column] = (kind, view)
+                tables[name] = SnapshotTable(name, row_count, views, strings)
+        except (struct.error, ValueError, TypeError):
+            return None
+
+        return cls(version.rstrip(b'\0').decode('ascii'), tables, mapping)
+
+    @property
+    def hotels(self):
+        return self.tables['hotel']
+
+    @property
+    def tours(self):
+        return self.tables['tour']
+
+    def get(self, item_type, item_id):
+        return self.tables[item_type].get(item_id)
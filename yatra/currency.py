@@ -0,0 +1,135 @@
+"""
+Exchange rates for YatraNepal
+
+NPR is the base currency: every catalog price is entered as price_nrp and
+the exchange_rate table records how many units of another currency one NPR
+buys, one row per rate change. Adding a currency is just inserting its first
+rate.
+
+current_rates() serves the latest effective rate per currency from an
+in-process cache that is reloaded only when the 'rates' version stamp changes
+(or when a future-dated rate becomes effective), so pricing never queries the
+table per request. Every price, USD included, is converted from price_nrp
+with these rates. price_usd is only a stored copy of the USD conversion for
+listings and the API: set_rate('USD', ...) rewrites it in the same
+transaction as the new rate, and current_rates() runs reprice_catalog() when
+a future-dated USD rate becomes effective.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import or_
+
+from .extensions import db, data_versions, lazy_subsystem
+from .models import Hotel, TourPackage, ExchangeRate
+
+BASE_CURRENCY = 'NPR'
+
+# Seed rates (currency units per NPR) for databases without any rates yet
+DEFAULT_RATES = {
+    'USD': 0.0075,
+    'INR': 0.625,
+    'EUR': 0.0069,
+    'CNY': 0.054,
+}
+
+
+class RateTable:
+    def __init__(self):
+        self.version = None
+        self.rates = {}
+        self.next_change = None     # effective_at of the earliest future-dated rate
+
+    def load(self, rows, version, now):
+        """Rebuild from (currency, rate, effective_at) rows ordered by effective_at"""
+        self.rates = {}
+        self.next_change = None
+        for currency, rate, effective_at in rows:
+            if effective_at <= now:
+                self.rates[currency] = rate
+            elif self.next_change is None or effective_at < self.next_change:
+                self.next_change = effective_at
+        self.version = version
+
+    def is_current(self, version, now):
+        return version == self.version and (self.next_change is None or now < self.next_change)
+
+
+@lazy_subsystem
+def rate_table(app):
+    return RateTable()
+
+def current_rates():
+    """{currency: units per NPR} for every currency with an effective rate"""
+    table = rate_table()
+    version = data_versions().get('rates')
+    now = datetime.utcnow()
+    if not table.is_current(version, now):
+        rows = (db.session.query(ExchangeRate.currency, ExchangeRate.rate, ExchangeRate.effective_at)
+                .order_by(ExchangeRate.effective_at, ExchangeRate.id)
+                .all())
+        previous = table.rates.get('USD')
+        table.load(rows, version, now)
+        if previous is not None and table.rates.get('USD') != previous:
+            # Covers scheduled USD rates taking effect; a no-op if set_rate() already repriced
+            reprice_catalog(table.rates['USD'])
+    return table.rates
+
+def set_rate(currency, rate, effective_at=None):
+    """Record a new rate; the session events bump the 'rates' stamp on commit.
+
+    A USD rate that is already effective also rewrites price_usd in the same transaction.
+    """
+    currency = currency.strip().upper()
+    if len(currency) != 3 or not currency.isalpha() or currency == BASE_CURRENCY:
+        raise ValueError(f'Invalid currency code: {currency}')
+    if rate <= 0:
+        raise ValueError('Rate must be positive')
+    now = datetime.utcnow()
+    effective_at = effective_at or now
+    db.session.add(ExchangeRate(currency=currency, rate=rate, effective_at=effective_at))
+    if currency == 'USD' and effective_at <= now:
+        if sum(db.session.execute(statement).rowcount for statement in reprice_statements(rate)):
+            # Bulk updates skip the session events that normally bump the stamp
+            db.session.info.setdefault('changed_scopes', set()).add('catalog')
+    db.session.commit()
+
+def seed_default_rates():
+    if not ExchangeRate.query.first():
+        for currency, rate in DEFAULT_RATES.items():
+            db.session.add(ExchangeRate(currency=currency, rate=rate, effective_at=datetime.utcnow()))
+        db.session.commit()
+
+def convert_prices(prices_nrp, currency, rates=None):
+    """Convert a batch of NPR amounts with a single rate lookup"""
+    if currency == BASE_CURRENCY:
+        return [float(price) for price in prices_nrp]
+    rates = current_rates() if rates is None else rates
+    if currency not in rates:
+        raise ValueError(f'No exchange rate for {currency}')
+    rate = rates[currency]
+    return [round(price * rate, 2) for price in prices_nrp]
+
+def reprice_statements(rate):
+    """One UPDATE per table setting price_usd from price_nrp, skipping rows already at that price"""
+    for model in (Hotel, TourPackage):
+        price = db.func.round(model.price_nrp * rate, 2)
+        yield (db.update(model)
+               .where(or_(model.price_usd.is_(None), model.price_usd != price))
+               .values(price_usd=price))
+
+def reprice_catalog(rate=None):
+    """Rewrite price_usd for every hotel and tour from price_nrp and the USD rate.
+
+    Runs in its own transaction and is a no-op when every price is current;
+    returns the number of rows repriced.
+    """
+    rate = current_rates().get('USD') if rate is None else rate
+    if rate is None:
+        raise ValueError('No exchange rate for USD')
+    with db.engine.begin() as conn:
+        count = sum(conn.execute(statement).rowcount for statement in reprice_statements(rate))
+    if count:
+        # Bulk updates skip the session events that normally bump the stamp
+        data_versions().bump('catalog')
+    return count
@@ -0,0 +1,38 @@
+"""
+Extension objects shared by every module, plus lazily built per-app subsystems
+
+Nothing here touches an application at import time; create_app() binds the
+extensions and each subsystem is constructed the first time it is used.
+"""
+
+import os
+from functools import wraps
+
+from flask import current_app
+from flask_login import LoginManager
+from flask_sqlalchemy import SQLAlchemy
+
+from .versions import VersionStamps
+
+db = SQLAlchemy()
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+
+
+def lazy_subsystem(factory):
+    """Turn factory(app) into an accessor that builds the object once per application"""
+    key = f'yatra.{factory.__name__}'
+
+    @wraps(factory)
+    def get():
+        app = current_app._get_current_object()
+        subsystem = app.extensions.get(key)
+        if subsystem is None:
+            subsystem = app.extensions[key] = factory(app)
+        return subsystem
+    return get
+
+
+@lazy_subsystem
+def data_versions(app):
+    return VersionStamps(os.path.join(app.instance_path, 'versions'))
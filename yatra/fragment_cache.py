@@ -0,0 +1,85 @@
+"""
+Template fragment caching
+
+Adds a {% cache %} block tag to Jinja:
+
+    {% cache 'hotel-card', hotel.id, catalog_version %}
+        ...markup that only depends on the hotel...
+    {% endcache %}
+
+The rendered markup is stored under the tuple of key expressions and reused
+until the key changes, so including the catalog version stamp in the key
+retires every cached card as soon as the catalog is edited. Anything that
+depends on the current user must stay outside the block.
+"""
+
+import threading
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from .extensions import lazy_subsystem
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments"""
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+@lazy_subsystem
+def fragment_cache(app):
+    return FragmentCache(app.config.get('FRAGMENT_CACHE_SIZE', 2048))
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render_cached', [nodes.Tuple(key, 'load')])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, key, caller):
+        if not has_app_context() or not current_app.config.get('FRAGMENT_CACHE_ENABLED', True):
+            return caller()
+
+        cache = fragment_cache()
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            cache.set(key, value)
+        return Markup(value)
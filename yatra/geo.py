@@ -0,0 +1,96 @@
+"""
+Coordinates and proximity search for hotels and tour waypoints
+
+Hotel locations and tour destinations are plain place names. A local
+gazetteer (gazetteer.csv) turns them into coordinates, which are stored in the
+place table, one row per hotel and per tour waypoint. SQLite triggers mirror
+every place row into the place_rtree R-tree, so a bounding-box lookup touches
+only the handful of index pages around the query point.
+
+nearest() answers k-nearest queries by searching a box around the point and
+widening it until k items fall inside the inscribed circle, then ranking the
+candidates by great-circle distance.
+"""
+
+import csv
+import math
+
+from sqlalchemy import text
+
+from .tags import normalize_tag
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+START_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 2500.0
+
+_BOX_QUERY = '''
+    SELECT place.item_type, place.item_id, place.name, place.latitude, place.longitude
+    FROM place_rtree JOIN place ON place.id = place_rtree.id
+    WHERE place_rtree.max_lat >= :min_lat AND place_rtree.min_lat <= :max_lat
+      AND place_rtree.max_lon >= :min_lon AND place_rtree.min_lon <= :max_lon
+'''
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) of a box containing the circle of radius_km"""
+    dlat = radius_km / KM_PER_DEGREE
+    dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon
+
+
+def nearest(session, latitude, longitude, k, item_type=None, max_km=MAX_RADIUS_KM, exclude=()):
+    """Up to k [(item_type, item_id, distance_km, place_name), ...] closest first.
+
+    A tour counts as close as its nearest waypoint. Items in exclude, given
+    as (item_type, item_id) pairs, are skipped.
+    """
+    radius = min(START_RADIUS_KM, max_km)
+    while True:
+        min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius)
+        params = {'min_lat': min_lat, 'max_lat': max_lat, 'min_lon': min_lon, 'max_lon': max_lon}
+        query = _BOX_QUERY
+        if item_type:
+            query += ' AND place.item_type = :item_type'
+            params['item_type'] = item_type
+        rows = session.execute(text(query), params)
+        best = {}
+        for row_type, row_id, name, row_lat, row_lon in rows:
+            key = (row_type, row_id)
+            if key in exclude:
+                continue
+            distance = haversine_km(latitude, longitude, row_lat, row_lon)
+            # Corners of the box lie outside the circle; keep them out until it grows
+            if distance <= radius and (key not in best or distance < best[key][2]):
+                best[key] = (row_type, row_id, distance, name)
+
+        if len(best) >= k or radius >= max_km:
+            return sorted(best.values(), key=lambda match: match[2])[:k]
+        radius = min(radius * 4, max_km)
+
+
+class Gazetteer:
+    """Place name -> (label, latitude, longitude) lookup"""
+
+    def __init__(self, places=None):
+        self.places = places or {}
+
+    @classmethod
+    def load(cls, path):
+        places = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = csv.DictReader(line for line in f if not line.startswith('#'))
+            for row in rows:
+                label = row['name'].strip()
+                places[normalize_tag(label)] = (label, float(row['latitude']), float(row['longitude']))
+        return cls(places)
+
+    def locate(self, name):
+        return self.places.get(normalize_tag(name or ''))
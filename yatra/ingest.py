@@ -0,0 +1,283 @@
+"""
+Write-behind ingestion for contact messages and reviews
+
+Instead of one transaction per form post, submit() appends the row to a
+per-process journal file and to a bounded in-memory queue, and a background
+thread inserts the queue in one transaction whenever INGEST_BATCH_SIZE rows
+are waiting or INGEST_FLUSH_SECONDS have passed. SQLite then sees a handful
+of short write transactions per second however many visitors post at once.
+
+Durability: a row is acknowledged only after it is written (and, with
+INGEST_FSYNC, fsynced) to instance/ingest/<pid>.log. A flush renames that
+journal to a .batch file, inserts its rows and deletes it; whatever a
+crashed worker leaves behind is replayed by the next worker to take a write,
+or by `flask flush-ingest`. Journals are held with an exclusive flock, so a worker
+only ever replays files whose owner has gone. A crash between the commit and
+the delete replays that batch again, so delivery is at-least-once.
+
+Backpressure: once INGEST_QUEUE_SIZE rows are waiting, counting a batch
+whose insert failed, submit() waits up to INGEST_BLOCK_SECONDS for the
+flusher and then flushes on the caller's thread, so a burst slows posting
+down instead of growing memory without bound. While the database refuses
+writes that flush raises, and posts fail instead of queueing. A failed
+batch is retried before anything else is rotated out of the journal, so
+there is never more than one batch file per worker, and the flusher backs
+off exponentially (up to MAX_BACKOFF_SECONDS) until a flush succeeds.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:     # Windows: no cross-process recovery while workers run
+    fcntl = None
+
+from flask import current_app
+
+from .extensions import db, data_versions, lazy_subsystem
+from .models import Review, Contact
+
+MODELS = {'review': Review, 'contact': Contact}
+TABLES = {kind: model.__table__ for kind, model in MODELS.items()}
+
+# Version scopes to bump after inserting each kind of row
+SCOPES = {'review': 'reviews'}
+
+# Longest wait between flush attempts while the database keeps failing
+MAX_BACKOFF_SECONDS = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+def lock_file(f, wait=False):
+    """Take an exclusive lock on an open journal; False if another live process holds it"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+def encode(kind, row):
+    return json.dumps({'kind': kind, **row, 'created_at': row['created_at'].isoformat()}) + '\n'
+
+def decode(line):
+    row = json.loads(line)
+    row['created_at'] = datetime.fromisoformat(row['created_at'])
+    return row.pop('kind'), row
+
+
+class WriteBuffer:
+    def __init__(self, engine, directory, batch_size=100, queue_size=1000, flush_seconds=1.0,
+                 block_seconds=0.5, fsync=True, on_flush=None):
+        self.engine = engine
+        self.directory = directory
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.flush_seconds = flush_seconds
+        self.block_seconds = block_seconds
+        self.fsync = fsync
+        self.on_flush = on_flush        # called with {kind: rows inserted} after each commit
+        self.pending = []               # (kind, row) in submission order
+        self.batch = None               # (batch path, open journal, rows) being inserted or retried
+        self.journal = None
+        self.sequence = 0
+        self.lock = threading.Lock()
+        self.flushing = threading.Lock()
+        self.wake = threading.Condition(self.lock)
+        self.space = threading.Condition(self.lock)
+        self.thread = None
+        self.closed = False
+        self.stats = {'submitted': 0, 'flushed': 0, 'commits': 0, 'blocked': 0}
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.directory, f'{os.getpid()}.log')
+
+    def _open_journal(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+        # Blocks only while another worker's recover() is looking at a file with our (reused) pid
+        lock_file(self.journal, wait=True)
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self._open_journal()
+            self.thread = threading.Thread(target=self._run, name='yatra-ingest', daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+        if fcntl is not None:
+            try:
+                self.recover()
+            except Exception:
+                logger.exception('Could not replay orphaned ingest journals; run `flask flush-ingest`')
+
+    def submit(self, kind, **row):
+        """Journal one row and queue it for the next batch; returns once the row is durable"""
+        if kind not in TABLES:
+            raise ValueError(f'Unknown row kind: {kind}')
+        row.setdefault('created_at', datetime.utcnow())
+        self.start()
+        with self.lock:
+            if self.waiting() >= self.queue_size:
+                self.stats['blocked'] += 1
+                self.wake.notify()
+                self.space.wait_for(lambda: self.waiting() < self.queue_size, self.block_seconds)
+            full = self.waiting() >= self.queue_size
+            if not full:
+                self._append(kind, row)
+        if full:
+            # The flusher is not keeping up: write our own batch (raising if the database
+            # is failing), then queue the row behind it
+            self.flush()
+            with self.lock:
+                self._append(kind, row)
+
+    def waiting(self):
+        """Rows accepted but not yet committed (call with the lock held)"""
+        return len(self.pending) + (len(self.batch[2]) if self.batch else 0)
+
+    def _append(self, kind, row):
+        self.journal.write(encode(kind, row))
+        self.journal.flush()
+        if self.fsync:
+            os.fsync(self.journal.fileno())
+        self.pending.append((kind, row))
+        self.stats['submitted'] += 1
+        if len(self.pending) >= self.batch_size:
+            self.wake.notify()
+
+    def _run(self):
+        failures = 0
+        while True:
+            with self.lock:
+                if failures:
+                    # Back off however much is queued, or a full queue retries a failing database in a tight loop
+                    backoff = min(self.flush_seconds * 2 ** (failures - 1), MAX_BACKOFF_SECONDS)
+                    self.wake.wait_for(lambda: self.closed, backoff)
+                else:
+                    self.wake.wait_for(lambda: self.closed or len(self.pending) >= self.batch_size, self.flush_seconds)
+                if self.closed:
+                    return
+            try:
+                self.flush()
+                failures = 0
+            except Exception:
+                # The rows stay journaled and are retried on the next pass
+                failures += 1
+                logger.exception('Ingest flush failed (%d in a row); %d rows waiting', failures, self.waiting())
+
+    def flush(self):
+        """Insert everything queued so far; returns the number of rows committed"""
+        with self.flushing:
+            count = 0
+            if self.batch is not None:
+                # Retry the failed batch first; until it commits, new rows stay in the journal
+                count += self._flush_batch()
+            with self.lock:
+                if not self.pending:
+                    return count
+                rows = self.pending
+                self.pending = []
+                self.sequence += 1
+                batch_path = os.path.join(self.directory, f'{os.getpid()}.{self.sequence}.batch')
+                # The open handle keeps its flock across the rename, so nobody else replays the batch
+                os.replace(self.journal_path, batch_path)
+                self.batch = (batch_path, self.journal, rows)
+                self._open_journal()
+            return count + self._flush_batch()
+
+    def _flush_batch(self):
+        batch_path, journal, rows = self.batch
+        count = self._insert(rows)
+        os.remove(batch_path)
+        journal.close()
+        with self.lock:
+            self.batch = None
+            self.space.notify_all()
+        return count
+
+    def _insert(self, rows):
+        by_kind = {}
+        for kind, row in rows:
+            by_kind.setdefault(kind, []).append(row)
+        with self.engine.begin() as conn:
+            for kind, kind_rows in by_kind.items():
+                conn.execute(TABLES[kind].insert(), kind_rows)
+        self.stats['commits'] += 1
+        self.stats['flushed'] += len(rows)
+        if self.on_flush:
+            self.on_flush({kind: len(kind_rows) for kind, kind_rows in by_kind.items()})
+        return len(rows)
+
+    def recover(self):
+        """Replay journals and batches left by processes that are no longer running"""
+        count = 0
+        own = {self.journal.name if self.journal else None, self.batch[0] if self.batch else None}
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.log')) +
+                           glob.glob(os.path.join(self.directory, '*.batch'))):
+            if path in own:
+                continue
+            with open(path, encoding='utf-8') as f:
+                if not lock_file(f):
+                    continue
+                rows = [decode(line) for line in f if line.strip()]
+                if not rows:
+                    continue    # its owner may have just created it; empty journals are removed on close
+                count += self._insert(rows)
+                os.remove(path)
+        return count
+
+    def close(self):
+        """Stop the flusher and write out whatever is still queued; the next submit() starts it again"""
+        with self.lock:
+            if self.thread is None:
+                return
+            self.closed = True
+            self.wake.notify()
+        self.thread.join()
+        self.flush()
+        with self.lock:
+            self.journal.close()
+            os.remove(self.journal_path)
+            self.journal = self.thread = None
+            self.closed = False
+        atexit.unregister(self.close)
+
+
+@lazy_subsystem
+def ingest_buffer(app):
+    versions = data_versions()
+
+    def bump_versions(counts):
+        scopes = {SCOPES[kind] for kind in counts if kind in SCOPES}
+        if scopes:
+            versions.bump(*scopes)
+
+    return WriteBuffer(
+        db.engine,
+        os.path.join(app.instance_path, 'ingest'),
+        batch_size=app.config.get('INGEST_BATCH_SIZE', 100),
+        queue_size=app.config.get('INGEST_QUEUE_SIZE', 1000),
+        flush_seconds=app.config.get('INGEST_FLUSH_SECONDS', 1.0),
+        block_seconds=app.config.get('INGEST_BLOCK_SECONDS', 0.5),
+        fsync=app.config.get('INGEST_FSYNC', True),
+        on_flush=bump_versions,
+    )
+
+def ingest(kind, **row):
+    """Store a review or contact row, through the write-behind buffer unless INGEST_BUFFER is off (default under TESTING)"""
+    if not current_app.config.get('INGEST_BUFFER', not current_app.testing):
+        db.session.add(MODELS[kind](**row))
+        db.session.commit()
+        return
+    ingest_buffer().submit(kind, **row)
@@ -0,0 +1,195 @@
+"""
+Time-decayed "trending" leaderboards for YatraNepal
+
+Every booking, review and detail-page view adds EVENT_WEIGHTS[event] to the
+item's popularity, and popularity halves every LEADERBOARD_HALF_LIFE seconds.
+Rather than decaying every score as time passes, scores use forward decay:
+an event at time t adds weight * 2 ** ((t - landmark) / half_life), which
+keeps the ranking identical to the decayed one while stored scores only ever
+grow. Recording an event is therefore one dict update plus moving a single
+entry inside a fixed-size top-N list, and reading the leaderboard is a slice
+of that list. Once the exponent gets large the landmark moves forward and
+every score is rescaled, a few times a year at the default half-life.
+
+Workers accumulate their increments in `pending` and, every
+LEADERBOARD_SYNC_SECONDS, add them to the shared file in the instance
+folder under an exclusive lock and adopt the merged totals, so every worker
+converges on the same board and a crash loses at most one interval. A
+worker with nothing pending just re-reads the file, which is only ever
+replaced whole, without taking the lock. Pending increments are also synced
+at exit.
+"""
+
+import atexit
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import insort
+
+try:
+    import fcntl
+except ImportError:     # Windows: syncs are not serialized between workers
+    fcntl = None
+
+from .similarity import ITEM_TYPES, encode_item, decode_item
+
+EVENT_WEIGHTS = {'view': 1.0, 'review': 3.0, 'booking': 10.0}
+HALF_LIFE = 7 * 24 * 3600
+TOP_N = 12
+REBASE_HALF_LIVES = 64      # rescale once scores reach 2 ** 64 times their starting weight
+
+FILE_MAGIC = b'YNLB'
+FILE_VERSION = 1
+HEADER = struct.Struct('<4sHdI')  # magic, version, landmark, item count
+
+
+class Leaderboard:
+    def __init__(self, path, half_life=HALF_LIFE, top_n=TOP_N, sync_seconds=60.0):
+        self.path = path
+        self.half_life = half_life
+        self.top_n = top_n
+        self.sync_seconds = sync_seconds
+        self.landmark = None
+        self.scores = {}            # encoded item -> forward-decayed score
+        self.pending = {}           # increments not yet written to the shared file
+        self.top = {item_type: [] for item_type in ITEM_TYPES}  # sorted (-score, item_id), at most top_n
+        self.synced_at = None
+        self.exit_hook = False
+
+    def _growth(self, now):
+        return 2.0 ** ((now - self.landmark) / self.half_life)
+
+    # Recording
+
+    def record(self, event, item_type, item_id, now=None):
+        now = time.time() if now is None else now
+        if self.landmark is None:
+            self.landmark = now
+        elif now - self.landmark > REBASE_HALF_LIVES * self.half_life:
+            self._rebase(now)
+        key = encode_item(item_type, item_id)
+        increment = EVENT_WEIGHTS[event] * self._growth(now)
+        self.scores[key] = self.scores.get(key, 0.0) + increment
+        self.pending[key] = self.pending.get(key, 0.0) + increment
+        if not self.exit_hook:
+            atexit.register(self.close)
+            self.exit_hook = True
+        self._promote(item_type, item_id, self.scores[key])
+
+    def _promote(self, item_type, item_id, score):
+        top = self.top[item_type]
+        for i, (_, other_id) in enumerate(top):
+            if other_id == item_id:
+                del top[i]
+                break
+        if len(top) < self.top_n or -score < top[-1][0]:
+            insort(top, (-score, item_id))
+            del top[self.top_n:]
+
+    def _rebase(self, landmark):
+        factor = 2.0 ** ((self.landmark - landmark) / self.half_life)
+        self.scores = {key: score * factor for key, score in self.scores.items()}
+        self.pending = {key: score * factor for key, score in self.pending.items()}
+        self.landmark = landmark
+        self._rebuild_top()
+
+    def _rebuild_top(self):
+        self.top = {item_type: [] for item_type in ITEM_TYPES}
+        for key, score in self.scores.items():
+            item_type, item_id = decode_item(key)
+            self.top[item_type].append((-score, item_id))
+        for top in self.top.values():
+            top.sort()
+            del top[self.top_n:]
+
+    # Serving
+
+    def leaders(self, item_type, limit=None):
+        """[(item_id, decayed score), ...] for the most popular items, best first"""
+        decay = 1.0 / self._growth(time.time()) if self.landmark is not None else 0.0
+        return [(item_id, -score * decay) for score, item_id in self.top[item_type][:limit]]
+
+    # Persistence
+
+    def _read(self):
+        """(landmark, {key: score}) from the shared file, or None"""
+        try:
+            with open(self.path, 'rb') as f:
+                magic, version, landmark, count = HEADER.unpack(f.read(HEADER.size))
+                if magic != FILE_MAGIC or version != FILE_VERSION:
+                    return None
+                keys, scores = array('q'), array('d')
+                keys.fromfile(f, count)
+                scores.fromfile(f, count)
+        except (OSError, EOFError, struct.error):
+            return None
+        return landmark, dict(zip(keys, scores))
+
+    def _write(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        keys = sorted(self.scores)
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(FILE_MAGIC, FILE_VERSION, self.landmark, len(keys)))
+            f.write(array('q', keys).tobytes())
+            f.write(array('d', (self.scores[key] for key in keys)).tobytes())
+        os.replace(tmp_path, self.path)
+
+    def sync(self, now=None):
+        """Add pending increments to the shared file and adopt the merged scores"""
+        now = time.time() if now is None else now
+        pending, landmark = self.pending, self.landmark
+        if not pending:
+            self._adopt(self._read(), landmark, now)
+        else:
+            with open(self.path + '.lock', 'a') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                self._adopt(self._read(), landmark, now)
+                self._merge(pending, landmark)
+                self._write()
+        self.pending = {}
+        self.synced_at = now
+        self._rebuild_top()
+
+    def _adopt(self, shared, landmark, now):
+        if shared is not None:
+            self.landmark, self.scores = shared
+        else:
+            self.landmark, self.scores = landmark or now, {}
+
+    def _merge(self, increments, landmark):
+        factor = 2.0 ** ((landmark - self.landmark) / self.half_life)
+        for key, increment in increments.items():
+            self.scores[key] = self.scores.get(key, 0.0) + increment * factor
+
+    def close(self):
+        """Exit hook: sync pending increments unless the instance folder has gone away"""
+        if self.pending:
+            try:
+                self.sync()
+            except FileNotFoundError:
+                pass
+
+    def maybe_sync(self, now=None):
+        now = time.time() if now is None else now
+        if self.synced_at is None or now - self.synced_at >= self.sync_seconds:
+            self.sync(now)
+
+    def rebuild(self, events):
+        """Replace the shared board with one built from (event, item_type, item_id, timestamp)"""
+        self.landmark = None
+        self.scores = {}
+        for event, item_type, item_id, timestamp in sorted(events, key=lambda event: event[3]):
+            self.record(event, item_type, item_id, now=timestamp)
+        self.pending = {}
+        if self.landmark is None:
+            self.landmark = time.time()
+        with open(self.path + '.lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._write()
+        self.synced_at = time.time()
+        self._rebuild_top()
@@ -0,0 +1,166 @@
+"""
+Scheduled maintenance for the SQLite database
+
+Four tasks, each with its own interval (MAINTENANCE_INTERVALS, in seconds):
+
+    optimize    ANALYZE the first time, PRAGMA optimize afterwards
+    vacuum      PRAGMA incremental_vacuum in chunks of MAINTENANCE_VACUUM_PAGES
+                pages, stopping after MAINTENANCE_VACUUM_SECONDS; each chunk is
+                its own short transaction so writers only ever wait for one
+    checkpoint  PRAGMA wal_checkpoint(PASSIVE), which never blocks readers or
+                writers
+    integrity   PRAGMA integrity_check
+
+`flask db-maintenance`, run from cron every few minutes, executes whichever
+tasks are due and records timings and results in instance/maintenance.json,
+which the admin status page reads. Incremental vacuum and checkpoints need
+auto_vacuum=INCREMENTAL and WAL journaling; databases created before this
+module have neither, so `flask db-maintenance --setup` converts them once
+with a full VACUUM.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from .extensions import db, lazy_subsystem
+
+TASKS = ('optimize', 'vacuum', 'checkpoint', 'integrity')
+
+DEFAULT_INTERVALS = {
+    'optimize': 24 * 3600,
+    'vacuum': 3600,
+    'checkpoint': 600,
+    'integrity': 7 * 24 * 3600,
+}
+
+AUTO_VACUUM_MODES = {0: 'none', 1: 'full', 2: 'incremental'}
+
+
+class Maintenance:
+    def __init__(self, database, state_path, intervals=None, vacuum_pages=256, vacuum_seconds=1.0):
+        self.database = database
+        self.state_path = state_path
+        self.intervals = {**DEFAULT_INTERVALS, **(intervals or {})}
+        self.vacuum_pages = vacuum_pages
+        self.vacuum_seconds = vacuum_seconds
+
+    def connect(self):
+        # A private autocommit connection, so every PRAGMA is its own short transaction
+        return sqlite3.connect(self.database, timeout=30, isolation_level=None)
+
+    def stats(self, conn):
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        freelist_count = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        wal_path = self.database + '-wal'
+        return {
+            'size_bytes': os.path.getsize(self.database),
+            'wal_bytes': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+            'page_size': page_size,
+            'page_count': page_count,
+            'freelist_count': freelist_count,
+            'fragmentation': round(100.0 * freelist_count / page_count, 2) if page_count else 0.0,
+            'auto_vacuum': AUTO_VACUUM_MODES.get(conn.execute('PRAGMA auto_vacuum').fetchone()[0], 'unknown'),
+            'journal_mode': conn.execute('PRAGMA journal_mode').fetchone()[0],
+        }
+
+    # Tasks return a short human-readable result
+    def optimize(self, conn):
+        has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+        if has_stats:
+            conn.execute('PRAGMA optimize')
+            return 'PRAGMA optimize'
+        conn.execute('ANALYZE')
+        return 'ANALYZE (first run)'
+
+    def vacuum(self, conn):
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            return 'skipped: auto_vacuum is not incremental (run with --setup)'
+        start = free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        deadline = time.perf_counter() + self.vacuum_seconds
+        while free and time.perf_counter() < deadline:
+            # The pragma frees one page per step, so drain it to finish the chunk
+            conn.execute(f'PRAGMA incremental_vacuum({self.vacuum_pages})').fetchall()
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return f'released {start - free} pages, {free} free pages left'
+
+    def checkpoint(self, conn):
+        if conn.execute('PRAGMA journal_mode').fetchone()[0] != 'wal':
+            return 'skipped: journal_mode is not wal (run with --setup)'
+        busy, log_frames, checkpointed = conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+        return f'{checkpointed}/{log_frames} WAL frames checkpointed' + (' (busy)' if busy else '')
+
+    def integrity(self, conn):
+        problems = [row[0] for row in conn.execute('PRAGMA integrity_check(20)')]
+        if problems == ['ok']:
+            return 'ok'
+        return 'FAILED: ' + '; '.join(problems)
+
+    def setup(self):
+        """Switch the file to incremental auto-vacuum and WAL; rewrites the whole database once"""
+        conn = self.connect()
+        try:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+            conn.execute('PRAGMA journal_mode = WAL')
+            return self.stats(conn)
+        finally:
+            conn.close()
+
+    def load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'tasks': {}}
+
+    def save_state(self, state):
+        tmp_path = f'{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def due(self, state=None, now=None):
+        state = state or self.load_state()
+        now = now or time.time()
+        return [task for task in TASKS
+                if now - state['tasks'].get(task, {}).get('timestamp', 0) >= self.intervals[task]]
+
+    def run(self, tasks=None):
+        """Run the given tasks (default: whichever are due) and return the updated state"""
+        state = self.load_state()
+        tasks = self.due(state) if tasks is None else tasks
+        conn = self.connect()
+        try:
+            state['before'] = self.stats(conn)
+            for task in tasks:
+                started = time.perf_counter()
+                result = getattr(self, task)(conn)
+                state['tasks'][task] = {
+                    'timestamp': time.time(),
+                    'ran_at': datetime.now().isoformat(timespec='seconds'),
+                    'seconds': round(time.perf_counter() - started, 4),
+                    'result': result,
+                }
+            state['after'] = self.stats(conn)
+            state['ran_at'] = datetime.now().isoformat(timespec='seconds')
+            state['ran'] = list(tasks)
+        finally:
+            conn.close()
+        self.save_state(state)
+        return state
+
+
+@lazy_subsystem
+def maintenance(app):
+    return Maintenance(
+        db.engine.url.database,
+        os.path.join(app.instance_path, 'maintenance.json'),
+        intervals=app.config.get('MAINTENANCE_INTERVALS'),
+        vacuum_pages=app.config.get('MAINTENANCE_VACUUM_PAGES', 256),
+        vacuum_seconds=app.config.get('MAINTENANCE_VACUUM_SECONDS', 1.0),
+    )
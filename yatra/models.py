@@ -0,0 +1,188 @@
+"""Database models"""
+
+from datetime import datetime
+
+from flask_login import UserMixin
+
+from .extensions import db, data_versions
+
+
+class User(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(120), nullable=False)
+    is_admin = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    bookings = db.relationship('Booking', backref='user', lazy=True)
+    reviews = db.relationship('Review', backref='user', lazy=True)
+
+class Hotel(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    location = db.Column(db.String(100), nullable=False)
+    price_nrp = db.Column(db.Float, nullable=False)
+    price_usd = db.Column(db.Float, nullable=False)
+    rating = db.Column(db.Float, default=0.0)
+    image_url = db.Column(db.String(200))
+    amenities = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class TourPackage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    duration = db.Column(db.String(50), nullable=False)
+    price_nrp = db.Column(db.Float, nullable=False)
+    price_usd = db.Column(db.Float, nullable=False)
+    rating = db.Column(db.Float, default=0.0)
+    image_url = db.Column(db.String(200))
+    destinations = db.Column(db.Text)
+    included_services = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Booking(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    booking_type = db.Column(db.String(20), nullable=False)  # 'hotel' or 'tour'
+    item_id = db.Column(db.Integer, nullable=False)
+    check_in_date = db.Column(db.Date, nullable=False)
+    check_out_date = db.Column(db.Date, nullable=False)
+    guests = db.Column(db.Integer, default=1)
+    total_amount = db.Column(db.Float, nullable=False)
+    currency = db.Column(db.String(3), default='NPR')
+    payment_status = db.Column(db.String(20), default='pending')
+    booking_status = db.Column(db.String(20), default='confirmed')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Review(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    review_type = db.Column(db.String(20), nullable=False)  # 'hotel' or 'tour'
+    item_id = db.Column(db.Integer, nullable=False)
+    rating = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Tag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'amenity', 'destination' or 'service'
+    name = db.Column(db.String(100), nullable=False)  # normalized, e.g. 'mountain view'
+    label = db.Column(db.String(100), nullable=False)  # as first entered, e.g. 'Mountain View'
+    __table_args__ = (db.UniqueConstraint('kind', 'name'),)
+
+class ItemTag(db.Model):
+    item_type = db.Column(db.String(20), primary_key=True)  # 'hotel' or 'tour'
+    item_id = db.Column(db.Integer, primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tag.id'), primary_key=True, index=True)
+
+# Coordinates of a hotel's location or one tour waypoint, filled from the gazetteer by yatra.geo
+class Place(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    item_type = db.Column(db.String(20), nullable=False)  # 'hotel' or 'tour'
+    item_id = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(100), nullable=False)  # gazetteer label, e.g. 'Namche Bazaar'
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    __table_args__ = (db.Index('ix_place_item', 'item_type', 'item_id'),)
+
+# R-tree over place coordinates; the triggers keep it in step with every insert, update and delete on place
+PLACE_RTREE_DDL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS place_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)',
+    """CREATE TRIGGER IF NOT EXISTS place_rtree_insert AFTER INSERT ON place BEGIN
+        INSERT INTO place_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS place_rtree_update AFTER UPDATE ON place BEGIN
+        DELETE FROM place_rtree WHERE id = old.id;
+        INSERT INTO place_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS place_rtree_delete AFTER DELETE ON place BEGIN
+        DELETE FROM place_rtree WHERE id = old.id;
+    END""",
+)
+for statement in PLACE_RTREE_DDL:
+    db.event.listen(Place.__table__, 'after_create', db.DDL(statement))
+
+# Units of currency per 1 NPR from effective_at on; the latest effective row per currency is current
+class ExchangeRate(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    currency = db.Column(db.String(3), nullable=False)
+    rate = db.Column(db.Float, nullable=False)
+    effective_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_exchange_rate_currency', 'currency', 'effective_at'),)
+
+class Contact(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Cold storage for finished bookings and old messages, filled by yatra.archive
+class BookingArchive(db.Model):
+    id = db.Column(db.Integer, primary_key=True)  # id the row had in booking
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    booking_type = db.Column(db.String(20), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    check_in_date = db.Column(db.Date, nullable=False)
+    check_out_date = db.Column(db.Date, nullable=False)
+    guests = db.Column(db.Integer, default=1)
+    total_amount = db.Column(db.Float, nullable=False)
+    currency = db.Column(db.String(3), default='NPR')
+    payment_status = db.Column(db.String(20), default='pending')
+    booking_status = db.Column(db.String(20), default='confirmed')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    archived_at = db.Column(db.DateTime, nullable=False)
+    user = db.relationship('User')
+
+class ContactArchive(db.Model):
+    id = db.Column(db.Integer, primary_key=True)  # id the row had in contact
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+
+# Data version stamps, replaced whenever a commit touches the scope's tables
+VERSION_SCOPES = {
+    'hotel': 'catalog',
+    'tour_package': 'catalog',
+    'tag': 'catalog',
+    'item_tag': 'catalog',
+    'place': 'catalog',
+    'booking': 'bookings',
+    'booking_archive': 'bookings',
+    'review': 'reviews',
+    'exchange_rate': 'rates',
+}
+
+# Scopes replaced only when a commit inserts or deletes rows of the table, not when it updates them
+COUNT_SCOPES = {
+    'booking': 'booking_counts',
+}
+
+@db.event.listens_for(db.session, 'before_flush')
+def collect_changed_scopes(session, flush_context, instances):
+    changed = session.info.setdefault('changed_scopes', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        scope = VERSION_SCOPES.get(getattr(obj, '__tablename__', None))
+        if scope:
+            changed.add(scope)
+    for obj in (*session.new, *session.deleted):
+        scope = COUNT_SCOPES.get(getattr(obj, '__tablename__', None))
+        if scope:
+            changed.add(scope)
+
+@db.event.listens_for(db.session, 'after_commit')
+def bump_changed_scopes(session):
+    changed = session.info.pop('changed_scopes', None)
+    if changed:
+        data_versions().bump(*changed)
+
+@db.event.listens_for(db.session, 'after_rollback')
+def discard_changed_scopes(session):
+    session.info.pop('changed_scopes', None)
@@ -0,0 +1,108 @@
+"""
+Pricing and quote engine for YatraNepal
+
+Single source of truth for booking prices:
+    hotel: unit price x guests x nights
+    tour:  unit price x guests
+where the unit price is the item's price in the chosen currency: price_nrp
+for NPR, or price_nrp converted with the current exchange rate for any other
+currency, USD included (see currency.py). The stored price_usd column is only
+a display copy of that conversion.
+
+quote_matrix() prices every combination of items x date ranges x guest counts
+x currencies in one call. Unit prices and night counts are resolved once per
+item/currency and per date range, so each cell is a single multiplication.
+"""
+
+from itertools import product
+
+# Currencies listed first everywhere; every currency but NPR is converted with its rate
+CURRENCIES = ('NPR', 'USD')
+BASE_CURRENCY = 'NPR'
+ITEM_TYPES = ('hotel', 'tour')
+
+
+class PricingError(ValueError):
+    pass
+
+
+def supported_currencies(rates=None):
+    """NPR and every currency with an effective rate in rates ({currency: units per NPR}), CURRENCIES first"""
+    rates = rates or {}
+    return (tuple(currency for currency in CURRENCIES if currency == BASE_CURRENCY or currency in rates)
+            + tuple(sorted(currency for currency in rates if currency not in CURRENCIES)))
+
+
+def unit_price(item, currency, rates=None):
+    """Price of one guest (per night for hotels) in the given currency"""
+    if currency == BASE_CURRENCY:
+        return float(item.price_nrp)
+    if rates and currency in rates:
+        return round(float(item.price_nrp) * rates[currency], 2)
+    raise PricingError(f'Unsupported currency: {currency}')
+
+
+def nights_between(check_in, check_out):
+    nights = (check_out - check_in).days
+    if nights <= 0:
+        raise PricingError('Check-out date must be after check-in!')
+    return nights
+
+
+def multiplier(item_type, guests, nights):
+    """How many unit prices a booking costs"""
+    if item_type not in ITEM_TYPES:
+        raise PricingError(f'Unknown item type: {item_type}')
+    return guests * nights if item_type == 'hotel' else guests
+
+
+def booking_total(item_type, item, currency, guests, check_in, check_out, rates=None):
+    """Total amount for a single booking, as charged by book()"""
+    return unit_price(item, currency, rates) * multiplier(item_type, guests, nights_between(check_in, check_out))
+
+
+def quote_matrix(items, date_ranges, guest_counts, currencies=CURRENCIES, rates=None):
+    """Price every items x date_ranges x guest_counts x currencies combination.
+
+    items is a list of (item_type, item) pairs. Returns a dict with one 'lines'
+    entry per combination and one 'totals' entry per date range/guests/currency
+    option, summing all items as a single itinerary. rates converts every
+    currency but NPR.
+    """
+    supported = supported_currencies(rates)
+    for currency in currencies:
+        if currency not in supported:
+            raise PricingError(f'Unsupported currency: {currency}')
+    for guests in guest_counts:
+        if guests < 1:
+            raise PricingError('Guests must be at least 1')
+
+    units = [[unit_price(item, currency, rates) for currency in currencies] for _, item in items]
+    nights = [nights_between(check_in, check_out) for check_in, check_out in date_ranges]
+
+    lines = []
+    totals = {}
+    for (i, (item_type, item)), (r, (check_in, check_out)), guests, (c, currency) in product(
+            enumerate(items), enumerate(date_ranges), guest_counts, enumerate(currencies)):
+        amount = units[i][c] * multiplier(item_type, guests, nights[r])
+        lines.append({
+            'type': item_type,
+            'item_id': item.id,
+            'check_in': check_in,
+            'check_out': check_out,
+            'nights': nights[r],
+            'guests': guests,
+            'currency': currency,
+            'amount': amount,
+        })
+        key = (r, guests, currency)
+        totals[key] = totals.get(key, 0.0) + amount
+
+    return {
+        'lines': lines,
+        'totals': [
+            {'check_in': date_ranges[r][0], 'check_out': date_ranges[r][1], 'guests': guests,
+             'currency': currency, 'amount': amount}
+            for (r, guests, currency), amount in totals.items()
+        ],
+    }
@@ -0,0 +1,154 @@
+"""Personalized recommendations"""
+
+from flask import Blueprint, render_template, redirect, url_for
+from flask_login import current_user
+
+from .catalog import get_catalog, get_tag_index, trending
+from .models import Booking, Review
+from .tags import split_tags, popcount
+
+bp = Blueprint('recommendations', __name__)
+
+
+@bp.route('/recommendations')
+def recommendations():
+    if not current_user.is_authenticated:
+        return redirect(url_for('auth.login'))
+    
+    index = get_tag_index()
+    catalog = get_catalog()
+
+    # Get user's booking history and preferences
+    user_bookings = Booking.query.filter_by(user_id=current_user.id).all()
+    user_reviews = Review.query.filter_by(user_id=current_user.id).all()
+    
+    # Build user profile based on preferences
+    user_profile = {
+        'preferred_locations': [],
+        'preferred_price_ranges': [],
+        'preferred_durations': [],
+        'preferred_amenities': [],
+        'preferred_destinations': [],
+        'rating_preferences': []
+    }
+    preferred_amenity_bits = 0
+    preferred_destination_bits = 0
+    
+    # Analyze user's booking history
+    for booking in user_bookings:
+        if booking.booking_type == 'hotel':
+            hotel = catalog.hotels.get(booking.item_id)
+            if hotel:
+                user_profile['preferred_locations'].append(hotel.location)
+                user_profile['preferred_price_ranges'].append(hotel.price_nrp)
+                user_profile['preferred_amenities'].extend(name for name, _ in split_tags(hotel.amenities))
+                preferred_amenity_bits |= index.bits('hotel', hotel.id, 'amenity')
+        else:
+            tour = catalog.tours.get(booking.item_id)
+            if tour:
+                user_profile['preferred_durations'].append(tour.duration)
+                user_profile['preferred_price_ranges'].append(tour.price_nrp)
+                user_profile['preferred_destinations'].extend(name for name, _ in split_tags(tour.destinations))
+                preferred_destination_bits |= index.bits('tour', tour.id, 'destination')
+    
+    # Analyze user's reviews
+    for review in user_reviews:
+        if review.rating >= 4:  # Only consider positive preferences
+            user_profile['rating_preferences'].append(review.rating)
+            if review.review_type == 'hotel':
+                hotel = catalog.hotels.get(review.item_id)
+                if hotel:
+                    user_profile['preferred_locations'].append(hotel.location)
+                    user_profile['preferred_amenities'].extend(name for name, _ in split_tags(hotel.amenities))
+                    preferred_amenity_bits |= index.bits('hotel', hotel.id, 'amenity')
+            else:
+                tour = catalog.tours.get(review.item_id)
+                if tour:
+                    user_profile['preferred_durations'].append(tour.duration)
+                    user_profile['preferred_destinations'].extend(name for name, _ in split_tags(tour.destinations))
+                    preferred_destination_bits |= index.bits('tour', tour.id, 'destination')
+    
+    # Calculate average preferences
+    avg_price = sum(user_profile['preferred_price_ranges']) / len(user_profile['preferred_price_ranges']) if user_profile['preferred_price_ranges'] else 0
+    avg_rating = sum(user_profile['rating_preferences']) / len(user_profile['rating_preferences']) if user_profile['rating_preferences'] else 3.5
+    preferred_amenity_count = popcount(preferred_amenity_bits)
+    preferred_destination_count = popcount(preferred_destination_bits)
+    
+    # Get all hotels and tours for scoring
+    all_hotels = catalog.hotels.rows()
+    all_tours = catalog.tours.rows()
+    
+    # Score hotels based on user preferences
+    hotel_scores = []
+    for hotel in all_hotels:
+        score = 0
+        
+        # Location preference (40% weight)
+        if hotel.location in user_profile['preferred_locations']:
+            score += 40
+        
+        # Price preference (25% weight)
+        if avg_price > 0:
+            price_diff = abs(hotel.price_nrp - avg_price) / avg_price
+            if price_diff <= 0.2:  # Within 20% of preferred price
+                score += 25
+            elif price_diff <= 0.5:  # Within 50% of preferred price
+                score += 15
+        
+        # Rating preference (20% weight)
+        if hotel.rating >= avg_rating:
+            score += 20
+        
+        # Amenities preference (15% weight)
+        if preferred_amenity_count:
+            amenity_match = popcount(index.bits('hotel', hotel.id) & preferred_amenity_bits) / preferred_amenity_count
+            score += amenity_match * 15
+        
+        hotel_scores.append((hotel, score))
+    
+    # Score tours based on user preferences
+    tour_scores = []
+    for tour in all_tours:
+        score = 0
+        
+        # Duration preference (35% weight)
+        if tour.duration in user_profile['preferred_durations']:
+            score += 35
+        
+        # Price preference (25% weight)
+        if avg_price > 0:
+            price_diff = abs(tour.price_nrp - avg_price) / avg_price
+            if price_diff <= 0.2:
+                score += 25
+            elif price_diff <= 0.5:
+                score += 15
+        
+        # Rating preference (20% weight)
+        if tour.rating >= avg_rating:
+            score += 20
+        
+        # Destinations preference (20% weight)
+        if preferred_destination_count:
+            destination_match = popcount(index.bits('tour', tour.id) & preferred_destination_bits) / preferred_destination_count
+            score += destination_match * 20
+        
+        tour_scores.append((tour, score))
+    
+    # Sort by score and get top recommendations
+    hotel_scores.sort(key=lambda x: x[1], reverse=True)
+    tour_scores.sort(key=lambda x: x[1], reverse=True)
+    
+    recommended_hotels = [hotel for hotel, score in hotel_scores[:6] if score > 0]
+    recommended_tours = [tour for tour, score in tour_scores[:6] if score > 0]
+    
+    # If no personalized recommendations, show what is trending
+    if not recommended_hotels:
+        recommended_hotels = trending('hotel')
+    
+    if not recommended_tours:
+        recommended_tours = trending('tour')
+    
+    return render_template('recommendations.html', 
+                         hotels=recommended_hotels, 
+                         tours=recommended_tours,
+                         user_profile=user_profile)
@@ -0,0 +1,349 @@
+"""
+Item-to-item "travellers also booked" similarity index for YatraNepal
+
+Builds an item-item cosine similarity matrix from user interactions
+(bookings and positive reviews), keeps the top-K neighbours of every hotel
+and tour, and stores them in a compact binary file so detail pages can
+serve "similar items" with a single indexed lookup.
+
+The file is a checkpoint: besides the neighbour table it holds the
+co-occurrence counts and each user's items as flat sorted arrays, plus how
+far into the interaction log they reach. Workers share new interactions
+through that append-only log: each one appends a fixed-size (user_id, item)
+record, and every worker loads the checkpoint and folds the records after
+it into small in-memory overlays, so one booking only ever rescores the
+rows it touches, whichever worker took it. Once CHECKPOINT_RECORDS records
+have been folded the overlays are merged back and the checkpoint rewritten.
+build() recomputes everything from the database and writes a fresh log
+holding just those interactions, compacting away anything appended before.
+"""
+
+import math
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+TOP_K = 6
+CHECKPOINT_RECORDS = 1000
+FILE_MAGIC = b'YNSI'
+FILE_VERSION = 2
+# magic, version, top_k, item count, co-occurrence entries, user count, user-item entries, log inode, log offset
+HEADER = struct.Struct('<4sHHIIIIQQ')
+LOG_RECORD = struct.Struct('<qq')  # user_id, encoded item
+
+ITEM_TYPES = ('hotel', 'tour')
+
+
+def encode_item(item_type, item_id):
+    """Pack (item_type, item_id) into a single sortable integer key"""
+    return (item_id << 1) | ITEM_TYPES.index(item_type)
+
+
+def decode_item(key):
+    """Unpack a key produced by encode_item()"""
+    return ITEM_TYPES[key & 1], key >> 1
+
+
+def csr(rows):
+    """({key: {column: value}} or {key: set}) -> sorted keys, row starts, columns[, values]"""
+    keys, starts, columns, values = array('q'), array('q', [0]), array('q'), array('q')
+    for key in sorted(rows):
+        row = rows[key]
+        for column in sorted(row):
+            columns.append(column)
+            if isinstance(row, dict):
+                values.append(row[column])
+        keys.append(key)
+        starts.append(len(columns))
+    return keys, starts, columns, values
+
+
+class SimilarityIndex:
+    """Sparse co-occurrence counts plus a top-K neighbour table.
+
+    Each user is a binary vector over items, so cosine similarity between two
+    items is co(i, j) / sqrt(n_i * n_j) where co(i, j) is the number of users
+    who interacted with both and n_i the number of users who interacted with i.
+    Only non-zero co-occurrences are stored: the checkpointed counts as CSR
+    arrays, and the records folded in since as dict overlays added on top.
+    """
+
+    def __init__(self, path, top_k=TOP_K, log_path=None, checkpoint_records=CHECKPOINT_RECORDS):
+        self.path = path
+        self.log_path = log_path or os.path.splitext(path)[0] + '.log'
+        self.top_k = top_k
+        self.checkpoint_records = checkpoint_records
+        self.log_inode = None
+        self.log_offset = 0             # log bytes reflected in the counts below
+        self.log_lock = threading.Lock()
+        self.mtime = None
+        # Checkpointed counts, item and user rows sorted by key
+        self.item_keys = array('q')
+        self.item_totals = array('q')
+        self.co_starts = array('q', [0])
+        self.co_keys = array('q')
+        self.co_counts = array('q')
+        self.users = array('q')
+        self.user_starts = array('q', [0])
+        self.user_keys = array('q')
+        # Records folded in since the checkpoint
+        self.folded = 0
+        self.user_items = defaultdict(set)
+        self.item_counts = defaultdict(int)
+        self.cooccurrence = defaultdict(lambda: defaultdict(int))
+        # Flat neighbour table: row i of keys has top_k slots in neighbours/scores
+        self.keys = array('q')
+        self.neighbours = array('q')
+        self.scores = array('f')
+
+    # Counts
+
+    def _row(self, keys, starts, key):
+        """(start, end) of key's row in a CSR table; an empty range if key has none"""
+        pos = bisect_left(keys, key)
+        if pos < len(keys) and keys[pos] == key:
+            return starts[pos], starts[pos + 1]
+        return 0, 0
+
+    def _items_of(self, user_id):
+        start, end = self._row(self.users, self.user_starts, user_id)
+        return set(self.user_keys[start:end]) | self.user_items.get(user_id, set())
+
+    def _total(self, key):
+        pos = bisect_left(self.item_keys, key)
+        base = self.item_totals[pos] if pos < len(self.item_keys) and self.item_keys[pos] == key else 0
+        return base + self.item_counts.get(key, 0)
+
+    def _cooccurring(self, key):
+        """{other: co(key, other)} from the checkpoint and the overlay"""
+        start, end = self._row(self.item_keys, self.co_starts, key)
+        counts = dict(zip(self.co_keys[start:end], self.co_counts[start:end]))
+        for other, count in self.cooccurrence.get(key, {}).items():
+            counts[other] = counts.get(other, 0) + count
+        return counts
+
+    def _set_counts(self, user_items, item_counts, cooccurrence):
+        self.item_keys, self.co_starts, self.co_keys, self.co_counts = csr(cooccurrence)
+        self.item_totals = array('q', (item_counts[key] for key in self.item_keys))
+        self.users, self.user_starts, self.user_keys, _ = csr(user_items)
+        self.folded = 0
+        self.user_items = defaultdict(set)
+        self.item_counts = defaultdict(int)
+        self.cooccurrence = defaultdict(lambda: defaultdict(int))
+
+    def _merge_overlay(self):
+        """Fold the overlays into the checkpointed arrays"""
+        user_items = {user_id: self._items_of(user_id) for user_id in set(self.users) | set(self.user_items)}
+        keys = set(self.item_keys) | set(self.item_counts)
+        self._set_counts(user_items, {key: self._total(key) for key in keys},
+                         {key: self._cooccurring(key) for key in keys})
+
+    # Building
+
+    def build(self, interactions):
+        """Rebuild everything from an iterable of (user_id, item_type, item_id), then save it with a fresh log"""
+        pairs = [(user_id, encode_item(item_type, item_id)) for user_id, item_type, item_id in interactions]
+        with self.log_lock:
+            self._build(pairs)
+            os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+            tmp_path = f'{self.log_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(b''.join(LOG_RECORD.pack(user_id, key) for user_id, key in pairs))
+            # The inode survives the rename, so the checkpoint can name the log before it is published
+            st = os.stat(tmp_path)
+            self.log_inode, self.log_offset = st.st_ino, st.st_size
+            self._save()
+            os.replace(tmp_path, self.log_path)
+
+    def _build(self, pairs):
+        user_items = defaultdict(set)
+        item_counts = defaultdict(int)
+        cooccurrence = defaultdict(lambda: defaultdict(int))
+
+        for user_id, key in pairs:
+            user_items[user_id].add(key)
+
+        for items in user_items.values():
+            items = sorted(items)
+            for i, a in enumerate(items):
+                item_counts[a] += 1
+                cooccurrence[a]
+                for b in items[i + 1:]:
+                    cooccurrence[a][b] += 1
+                    cooccurrence[b][a] += 1
+
+        self._set_counts(user_items, item_counts, cooccurrence)
+        self._write_rows({key: self._top_neighbours(key) for key in self.item_keys}, replace=True)
+
+    def _count(self, user_id, key):
+        items = self._items_of(user_id)
+        if key in items:
+            return False
+
+        for other in items:
+            self.cooccurrence[key][other] += 1
+            self.cooccurrence[other][key] += 1
+        self.user_items[user_id].add(key)
+        self.item_counts[key] += 1
+        self.folded += 1
+        return True
+
+    def _rescore(self, keys):
+        # n_key changed, so every item co-occurring with key needs rescoring
+        affected = set(keys)
+        for key in keys:
+            affected.update(self._cooccurring(key))
+        self._write_rows({k: self._top_neighbours(k) for k in affected})
+
+    def _top_neighbours(self, key):
+        norm = self._total(key)
+        scored = [
+            (count / math.sqrt(norm * self._total(other)), other)
+            for other, count in self._cooccurring(key).items()
+        ]
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return scored[:self.top_k]
+
+    def _write_rows(self, rows, replace=False):
+        if replace:
+            self.keys = array('q')
+            self.neighbours = array('q')
+            self.scores = array('f')
+
+        k = self.top_k
+        for key in sorted(rows):
+            row_neighbours = [other for _, other in rows[key]]
+            row_scores = [score for score, _ in rows[key]]
+            pad = k - len(row_neighbours)
+            row_neighbours += [-1] * pad
+            row_scores += [0.0] * pad
+
+            pos = bisect_left(self.keys, key)
+            if pos < len(self.keys) and self.keys[pos] == key:
+                self.neighbours[pos * k:(pos + 1) * k] = array('q', row_neighbours)
+                self.scores[pos * k:(pos + 1) * k] = array('f', row_scores)
+            else:
+                self.keys.insert(pos, key)
+                self.neighbours[pos * k:pos * k] = array('q', row_neighbours)
+                self.scores[pos * k:pos * k] = array('f', row_scores)
+
+    def knows(self, user_id, item_type, item_id):
+        return encode_item(item_type, item_id) in self._items_of(user_id)
+
+    # Shared interaction log
+
+    def append(self, user_id, item_type, item_id):
+        """Publish one interaction to every worker; O_APPEND keeps concurrent records whole"""
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, LOG_RECORD.pack(user_id, encode_item(item_type, item_id)))
+        finally:
+            os.close(fd)
+
+    def catch_up(self):
+        """Fold in log records appended since the last call; False if there is no log yet"""
+        with self.log_lock:
+            try:
+                st = os.stat(self.log_path)
+            except OSError:
+                return False
+            if st.st_ino != self.log_inode or st.st_size < self.log_offset:
+                # A new log: start from its checkpoint, or replay it whole if there is none
+                if not self._load(st.st_ino, st.st_size):
+                    self._build([])
+                    self.log_inode, self.log_offset = st.st_ino, 0
+            elif self.is_stale():
+                # Another worker checkpointed further than we have folded
+                self._load(st.st_ino, st.st_size, min_offset=self.log_offset + 1)
+
+            size = (st.st_size - self.log_offset) // LOG_RECORD.size * LOG_RECORD.size
+            if size:
+                with open(self.log_path, 'rb') as f:
+                    f.seek(self.log_offset)
+                    data = f.read(size)
+                pairs = list(LOG_RECORD.iter_unpack(data))
+                if not self.item_keys and not self.folded:
+                    self._build(pairs)
+                else:
+                    # Rescore each touched row once per catch-up rather than once per record
+                    self._rescore({key for user_id, key in pairs if self._count(user_id, key)})
+                self.log_offset += len(data)
+                if self.folded >= self.checkpoint_records:
+                    self._save()
+            return True
+
+    # Persistence
+
+    def _save(self):
+        """Merge the overlays and write the checkpoint atomically (call with log_lock held)"""
+        if self.folded:
+            self._merge_overlay()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(FILE_MAGIC, FILE_VERSION, self.top_k, len(self.keys), len(self.co_keys),
+                                len(self.users), len(self.user_keys), self.log_inode, self.log_offset))
+            for table in (self.keys, self.neighbours, self.scores, self.item_totals, self.co_starts,
+                          self.co_keys, self.co_counts, self.users, self.user_starts, self.user_keys):
+                f.write(table.tobytes())
+        os.replace(tmp_path, self.path)
+        self.mtime = os.stat(self.path).st_mtime_ns
+
+    def _load(self, log_inode, log_size, min_offset=0):
+        """Adopt the checkpoint if it covers at least min_offset bytes of this log; False if unusable"""
+        try:
+            # Remembered even when the file is unusable, so is_stale() only fires again once it changes
+            self.mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, 'rb') as f:
+                (magic, version, top_k, item_count, co_count, user_count, user_item_count,
+                 inode, offset) = HEADER.unpack(f.read(HEADER.size))
+                if (magic != FILE_MAGIC or version != FILE_VERSION or top_k != self.top_k
+                        or inode != log_inode or not min_offset <= offset <= log_size):
+                    return False
+                tables = []
+                for typecode, count in (('q', item_count), ('q', item_count * top_k), ('f', item_count * top_k),
+                                        ('q', item_count), ('q', item_count + 1), ('q', co_count),
+                                        ('q', co_count), ('q', user_count), ('q', user_count + 1),
+                                        ('q', user_item_count)):
+                    table = array(typecode)
+                    table.fromfile(f, count)
+                    tables.append(table)
+        except (OSError, EOFError, struct.error):
+            return False
+
+        (self.keys, self.neighbours, self.scores, self.item_totals, self.co_starts,
+         self.co_keys, self.co_counts, self.users, self.user_starts, self.user_keys) = tables
+        self.item_keys = array('q', self.keys)
+        self.folded = 0
+        self.user_items = defaultdict(set)
+        self.item_counts = defaultdict(int)
+        self.cooccurrence = defaultdict(lambda: defaultdict(int))
+        self.log_inode, self.log_offset = log_inode, offset
+        return True
+
+    def is_stale(self):
+        """True when another process has written a newer checkpoint than the one loaded"""
+        try:
+            return os.stat(self.path).st_mtime_ns != self.mtime
+        except OSError:
+            return False
+
+    # Serving
+
+    def similar(self, item_type, item_id, limit=None):
+        """Return [(item_type, item_id, score), ...] for the given item"""
+        key = encode_item(item_type, item_id)
+        pos = bisect_left(self.keys, key)
+        if pos == len(self.keys) or self.keys[pos] != key:
+            return []
+
+        k = self.top_k
+        results = []
+        for other, score in zip(self.neighbours[pos * k:(pos + 1) * k], self.scores[pos * k:(pos + 1) * k]):
+            if other < 0:
+                break
+            results.append((*decode_item(other), score))
+        return results[:limit] if limit else results
@@ -0,0 +1,78 @@
+"""
+Tag normalization and bitset matching for YatraNepal
+
+Hotel amenities and tour destinations/services are entered as free-text,
+comma-separated strings. This module normalizes them into a tag vocabulary
+and represents every item's tags as an integer bitset (bit n set means the
+item carries the tag with id n), so filtering and overlap scoring are
+bitwise operations instead of string splitting.
+"""
+
+import re
+
+TAG_KINDS = ('amenity', 'destination', 'service')
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_tag(raw):
+    """'  Mountain   VIEW ' -> 'mountain view'"""
+    return _WHITESPACE.sub(' ', raw).strip().casefold()
+
+
+def split_tags(text):
+    """Split a comma-separated string into [(name, label), ...] without duplicates"""
+    tags = []
+    seen = set()
+    for part in (text or '').split(','):
+        label = _WHITESPACE.sub(' ', part).strip()
+        name = label.casefold()
+        if name and name not in seen:
+            seen.add(name)
+            tags.append((name, label))
+    return tags
+
+
+def popcount(bits):
+    return bin(bits).count('1')
+
+
+class TagIndex:
+    """In-memory view of the tag tables: per-item bitsets and the vocabulary"""
+
+    def __init__(self):
+        self.version = None
+        self.tag_ids = {}       # (kind, name) -> tag id
+        self.kind_masks = {}    # kind -> OR of every tag bit of that kind
+        self.item_bits = {}     # (item_type, item_id) -> bitset
+
+    def load(self, tags, item_tags, version):
+        """Rebuild from (id, kind, name) and (item_type, item_id, tag_id) rows"""
+        self.tag_ids = {}
+        self.kind_masks = dict.fromkeys(TAG_KINDS, 0)
+        for tag_id, kind, name in tags:
+            self.tag_ids[(kind, name)] = tag_id
+            self.kind_masks[kind] = self.kind_masks.get(kind, 0) | (1 << tag_id)
+
+        self.item_bits = {}
+        for item_type, item_id, tag_id in item_tags:
+            key = (item_type, item_id)
+            self.item_bits[key] = self.item_bits.get(key, 0) | (1 << tag_id)
+        self.version = version
+
+    def bits(self, item_type, item_id, kind=None):
+        bits = self.item_bits.get((item_type, item_id), 0)
+        return bits & self.kind_masks.get(kind, 0) if kind else bits
+
+    def mask(self, kind, labels):
+        """Bitset for the given tag labels; None if any of them is unknown"""
+        mask = 0
+        for label in labels:
+            tag_id = self.tag_ids.get((kind, normalize_tag(label)))
+            if tag_id is None:
+                return None
+            mask |= 1 << tag_id
+        return mask
+
+    def matches_all(self, item_type, item_id, mask):
+        return mask is not None and self.bits(item_type, item_id) & mask == mask
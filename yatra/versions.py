@@ -0,0 +1,37 @@
+"""
+Cross-process data version stamps for YatraNepal
+
+Each scope ('catalog', 'bookings', 'reviews', ...) has a small file under the
+instance folder holding a random token that is replaced whenever data in
+that scope changes. Every worker process can tell whether something changed
+by reading a few bytes from disk, without touching the database.
+"""
+
+import os
+import threading
+import uuid
+
+
+class VersionStamps:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, scope):
+        return os.path.join(self.directory, scope + '.version')
+
+    def get(self, scope):
+        try:
+            with open(self._path(scope)) as f:
+                return f.read().strip() or '0'
+        except OSError:
+            return '0'
+
+    def bump(self, *scopes):
+        os.makedirs(self.directory, exist_ok=True)
+        for scope in scopes:
+            path = self._path(scope)
+            # Unique per thread: concurrent commits in one worker bump the same scope
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(uuid.uuid4().hex)
+            os.replace(tmp_path, path)